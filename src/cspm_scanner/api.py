@@ -1,13 +1,22 @@
 """FastAPI REST API for CSPM Scanner."""
 
 import asyncio
+import logging
+import os
+import queue
+import time
 import uuid
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import List, Literal, Optional, Dict, Any, Set
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Query
+import aiofiles.os
+from fastapi import FastAPI, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 
 from .models import ScanRequest, ScanResult, ScanStatus, ResourceType, SeverityLevel
@@ -17,13 +26,19 @@ from .auth import auth_manager
 from .config import settings
 
 
+logger = logging.getLogger(__name__)
+_log_listener: Optional[QueueListener] = None
+_log_handler: Optional[QueueHandler] = None
+
+
 # FastAPI app instance
 app = FastAPI(
     title="Cloud Security Posture Scanner API",
     description="Azure security scanner API for detecting misconfigurations",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -35,9 +50,174 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class ScanRegistryFull(Exception):
+    """Raised when a scan cannot be registered because every slot holds an unfinished scan."""
+
+
+class ScanRegistry:
+    """Bounded, sharded store of scan statuses keyed by scan ID.
+
+    Pending and running scans never expire and are never evicted. Finished
+    scans expire ``ttl`` seconds after they finished. Once the registry holds
+    ``maxsize`` entries, a new scan makes room by evicting the scan that
+    finished first; if every entry is unfinished, the new scan is rejected.
+    Results of finished scans are kept only for the ``max_results`` most
+    recently used scans; older ones are dropped, and the API serves or points
+    to the scan's saved reports instead. All access happens on the event loop
+    and no method awaits, so the shards need no locking. ``list`` serves a
+    cached snapshot that is rebuilt only after a write or once its earliest
+    entry expires. Each uvicorn worker keeps its own registry, so
+    multi-worker deployments rely on sticky routing.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, max_results: int, shards: int = 16):
+        self._mask = shards - 1
+        self._shards = [OrderedDict() for _ in range(shards)]
+        self._maxsize = max(1, maxsize)
+        self._size = 0
+        self._ttl = ttl
+        self._results: OrderedDict = OrderedDict()
+        self._max_results = max_results
+        self._snapshot: Optional[List[ScanStatus]] = None
+        self._snapshot_expires_at = 0.0
+    
+    def _shard(self, scan_id: str) -> OrderedDict:
+        return self._shards[hash(scan_id) & self._mask]
+    
+    def get(self, scan_id: str) -> Optional[ScanStatus]:
+        """Return the status for a scan, or None if unknown or expired."""
+        shard = self._shard(scan_id)
+        entry = shard.get(scan_id)
+        if entry is None:
+            return None
+        
+        expires_at, scan_status = entry
+        if expires_at < time.monotonic():
+            self._remove(shard, scan_id)
+            return None
+        
+        if scan_id in self._results:
+            self._results.move_to_end(scan_id)
+        
+        return scan_status
+    
+    def set(self, scan_id: str, scan_status: ScanStatus) -> None:
+        """Store a scan status, evicting the earliest finished scan if the registry is full.
+        
+        Raises ScanRegistryFull if every stored scan is unfinished.
+        """
+        shard = self._shard(scan_id)
+        if scan_id not in shard:
+            if self._size >= self._maxsize:
+                self._evict_finished()
+            self._size += 1
+        
+        expires_at = time.monotonic() + self._ttl if scan_status.completed_at is not None else float("inf")
+        shard[scan_id] = (expires_at, scan_status)
+        shard.move_to_end(scan_id)
+        self._snapshot = None
+    
+    def mark_finished(self, scan_id: str) -> None:
+        """Start a finished scan's retention period, dropping the least recently used results."""
+        shard = self._shard(scan_id)
+        entry = shard.get(scan_id)
+        if entry is None:
+            # Deleted while it was running
+            return
+        
+        shard[scan_id] = (time.monotonic() + self._ttl, entry[1])
+        shard.move_to_end(scan_id)
+        self._snapshot = None
+        
+        self._results[scan_id] = None
+        self._results.move_to_end(scan_id)
+        
+        while len(self._results) > self._max_results:
+            evicted_id, _ = self._results.popitem(last=False)
+            entry = self._shard(evicted_id).get(evicted_id)
+            if entry is not None:
+                entry[1].result = None
+    
+    def delete(self, scan_id: str) -> bool:
+        """Remove a scan status. Returns False if it was not present."""
+        shard = self._shard(scan_id)
+        if scan_id not in shard:
+            return False
+        
+        self._remove(shard, scan_id)
+        return True
+    
+    def _evict_finished(self) -> None:
+        """Make room by dropping expired entries, or else the scan that finished first."""
+        self._rebuild_snapshot()
+        if self._size < self._maxsize:
+            return
+        
+        # Finished entries move to the end of their shard when they finish, so each
+        # shard's first finished entry is its oldest, and expires before the later ones
+        victim = None
+        for shard in self._shards:
+            for scan_id, (expires_at, scan_status) in shard.items():
+                if scan_status.completed_at is not None:
+                    if victim is None or expires_at < victim[0]:
+                        victim = (expires_at, shard, scan_id)
+                    break
+        
+        if victim is None:
+            raise ScanRegistryFull("Too many scans in progress")
+        self._remove(victim[1], victim[2])
+    
+    def _remove(self, shard: OrderedDict, scan_id: str) -> None:
+        del shard[scan_id]
+        self._size -= 1
+        self._results.pop(scan_id, None)
+        self._snapshot = None
+    
+    def list(self) -> List[ScanStatus]:
+        """Return all live scan statuses. Callers must not mutate the list."""
+        snapshot = self._snapshot
+        if snapshot is None or self._snapshot_expires_at < time.monotonic():
+            snapshot = self._rebuild_snapshot()
+        return snapshot
+    
+    def _rebuild_snapshot(self) -> List[ScanStatus]:
+        """Drop expired entries and rebuild the cached status list."""
+        now = time.monotonic()
+        statuses = []
+        next_expiry = float("inf")
+        
+        for shard in self._shards:
+            expired = [scan_id for scan_id, (expires_at, _) in shard.items() if expires_at < now]
+            for scan_id in expired:
+                del shard[scan_id]
+                self._results.pop(scan_id, None)
+            self._size -= len(expired)
+            for expires_at, scan_status in shard.values():
+                statuses.append(scan_status)
+                next_expiry = min(next_expiry, expires_at)
+        
+        self._snapshot = statuses
+        self._snapshot_expires_at = next_expiry
+        return statuses
+
+
 # Global scan tracking
-active_scans: Dict[str, ScanStatus] = {}
+scan_registry = ScanRegistry(
+    settings.max_active_scans,
+    settings.scan_retention_seconds,
+    settings.completed_scan_cache
+)
 report_generator = ReportGenerator(settings.report_output_dir)
+REPORTS_DIR = Path(settings.report_output_dir).resolve()
+
+# Report rendering and file writes run here so they never block the event loop
+report_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cspm-report")
+
+# Background scan tracking; the semaphore is created on startup so it binds
+# to the server's event loop
+bg_tasks: Set[asyncio.Task] = set()
+scan_semaphore: Optional[asyncio.Semaphore] = None
 
 
 class ScanStartResponse(BaseModel):
@@ -79,19 +259,17 @@ async def health_check():
 async def list_subscriptions():
     """List all accessible Azure subscriptions."""
     try:
-        subscriptions = auth_manager.list_subscriptions()
+        subscriptions = await auth_manager.list_subscriptions_async()
+        # Entries come straight from the Azure SDK, so skip re-validating them
         return [
-            SubscriptionInfo(**sub) for sub in subscriptions
+            SubscriptionInfo.model_construct(**sub) for sub in subscriptions
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/scan/start", response_model=ScanStartResponse)
-async def start_scan(
-    scan_request: ScanRequest,
-    background_tasks: BackgroundTasks
-):
+async def start_scan(scan_request: ScanRequest):
     """Start a new security scan."""
     try:
         # Validate scan request
@@ -111,14 +289,18 @@ async def start_scan(
             status="pending",
             progress=0
         )
-        active_scans[scan_id] = scan_status
+        try:
+            scan_registry.set(scan_id, scan_status)
+        except ScanRegistryFull:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many scans in progress, retry once a running scan finishes"
+            )
         
         # Start background scan
-        background_tasks.add_task(
-            run_background_scan,
-            scan_id,
-            scan_request
-        )
+        task = asyncio.create_task(_guarded_scan(scan_id, scan_request))
+        bg_tasks.add(task)
+        task.add_done_callback(bg_tasks.discard)
         
         return ScanStartResponse(
             scan_id=scan_id,
@@ -126,6 +308,8 @@ async def start_scan(
             message="Scan started successfully"
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -133,29 +317,28 @@ async def start_scan(
 @app.get("/scan/{scan_id}/status", response_model=ScanStatus)
 async def get_scan_status(scan_id: str):
     """Get status of a running scan."""
-    if scan_id not in active_scans:
+    scan_status = scan_registry.get(scan_id)
+    if scan_status is None:
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    return active_scans[scan_id]
+    return scan_status
 
 
 @app.get("/scan/{scan_id}/result", response_model=ScanResult)
 async def get_scan_result(scan_id: str):
     """Get result of a completed scan."""
-    if scan_id not in active_scans:
+    scan_status = scan_registry.get(scan_id)
+    if scan_status is None:
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    scan_status = active_scans[scan_id]
-    
     if scan_status.status != "completed":
         raise HTTPException(
             status_code=400, 
             detail=f"Scan not completed. Current status: {scan_status.status}"
         )
     
-    # Return the stored result (would need to store results in practice)
-    if not hasattr(scan_status, 'result'):
-        raise HTTPException(status_code=404, detail="Scan result not available")
+    if scan_status.result is None:
+        raise _evicted_result_error(scan_status)
     
     return scan_status.result
 
@@ -163,36 +346,70 @@ async def get_scan_result(scan_id: str):
 @app.get("/scan/{scan_id}/report")
 async def download_scan_report(
     scan_id: str, 
-    format: str = Query("json", regex="^(json|html)$")
+    format: Literal["json", "html"] = "json"
 ):
     """Download scan report in specified format."""
-    if scan_id not in active_scans:
+    scan_status = scan_registry.get(scan_id)
+    if scan_status is None:
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    scan_status = active_scans[scan_id]
-    
     if scan_status.status != "completed":
         raise HTTPException(
             status_code=400, 
             detail=f"Scan not completed. Current status: {scan_status.status}"
         )
     
-    if not hasattr(scan_status, 'result'):
-        raise HTTPException(status_code=404, detail="Scan result not available")
+    filename = f"scan_report_{scan_id}.{format}"
+    
+    loop = asyncio.get_running_loop()
+    
+    if scan_status.result is None:
+        # Serve the report written when the scan finished
+        report_file = scan_status.report_files.get(format)
+        if report_file is None or not os.path.isfile(report_file):
+            raise _evicted_result_error(scan_status)
+        
+        if format == "json":
+            return FileResponse(
+                report_file,
+                media_type="application/json",
+                filename=filename
+            )
+        
+        # The saved copy links the shared assets next to it, so inline them for download
+        content = await loop.run_in_executor(
+            report_executor,
+            report_generator.load_html_report,
+            report_file
+        )
+        return Response(
+            content,
+            media_type="text/html",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     
     try:
-        # Generate report
+        # Reports are rendered straight into the response body; nothing touches disk.
+        # HTML reports are rendered self-contained, since the download has no assets beside it.
         if format == "json":
-            report_file = report_generator.generate_json_report(scan_status.result)
-        elif format == "html":
-            report_file = report_generator.generate_html_report(scan_status.result)
+            content = await loop.run_in_executor(
+                report_executor,
+                report_generator.render_json_report,
+                scan_status.result
+            )
+            media_type = "application/json"
         else:
-            raise HTTPException(status_code=400, detail="Unsupported format")
+            content = await loop.run_in_executor(
+                report_executor,
+                report_generator.render_html_report,
+                scan_status.result
+            )
+            media_type = "text/html"
         
-        return FileResponse(
-            report_file,
-            media_type="application/octet-stream",
-            filename=f"scan_report_{scan_id}.{format}"
+        return Response(
+            content,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
         )
         
     except Exception as e:
@@ -202,16 +419,15 @@ async def download_scan_report(
 @app.get("/scans", response_model=List[ScanStatus])
 async def list_scans():
     """List all scans (active and recent)."""
-    return list(active_scans.values())
+    return scan_registry.list()
 
 
 @app.delete("/scan/{scan_id}")
 async def delete_scan(scan_id: str):
     """Delete a scan and its results."""
-    if scan_id not in active_scans:
+    if not scan_registry.delete(scan_id):
         raise HTTPException(status_code=404, detail="Scan not found")
     
-    del active_scans[scan_id]
     return {"message": "Scan deleted successfully"}
 
 
@@ -231,20 +447,17 @@ async def list_reports():
 @app.get("/reports/{filename}")
 async def download_report(filename: str):
     """Download a specific report file."""
-    try:
-        file_path = f"{settings.report_output_dir}/{filename}"
-        
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="Report not found")
-        
-        return FileResponse(
-            file_path,
-            media_type="application/octet-stream",
-            filename=filename
-        )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    file_path = (REPORTS_DIR / filename).resolve()
+    
+    # Only serve regular files that live inside the reports directory
+    if REPORTS_DIR not in file_path.parents or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    return FileResponse(
+        file_path,
+        media_type="application/octet-stream",
+        filename=filename
+    )
 
 
 @app.delete("/reports/cleanup")
@@ -272,12 +485,34 @@ async def get_severity_levels():
     return [level.value for level in SeverityLevel]
 
 
+def _evicted_result_error(scan_status: ScanStatus) -> HTTPException:
+    """Build the error for a finished scan whose result is no longer held in memory."""
+    report_file = scan_status.report_files.get("json")
+    if report_file is None or not os.path.isfile(report_file):
+        return HTTPException(status_code=404, detail="Scan result not available")
+    
+    return HTTPException(
+        status_code=410,
+        detail=f"Scan result is no longer held in memory; download /reports/{os.path.basename(report_file)}"
+    )
+
+
+async def _guarded_scan(scan_id: str, scan_request: ScanRequest):
+    """Run a background scan once a concurrent scan slot is free."""
+    async with scan_semaphore:
+        await run_background_scan(scan_id, scan_request)
+
+
 async def run_background_scan(scan_id: str, scan_request: ScanRequest):
     """Run scan in background and update status."""
+    scan_status = scan_registry.get(scan_id)
+    if scan_status is None:
+        return
+    
     try:
         # Update status to running
-        active_scans[scan_id].status = "running"
-        active_scans[scan_id].progress = 10
+        scan_status.status = "running"
+        scan_status.progress = 10
         
         # Determine subscription to scan
         subscription_id = scan_request.subscription_id
@@ -288,52 +523,111 @@ async def run_background_scan(scan_id: str, scan_request: ScanRequest):
             scan_result = await scanner_engine.scan_subscription(subscription_id, scan_request)
         
         # Update progress
-        active_scans[scan_id].progress = 90
+        scan_status.progress = 90
         
         # Store result
-        active_scans[scan_id].result = scan_result
+        scan_status.result = scan_result
         
         # Mark as completed
-        active_scans[scan_id].status = "completed"
-        active_scans[scan_id].progress = 100
-        active_scans[scan_id].completed_at = datetime.utcnow()
+        scan_status.status = "completed"
+        scan_status.progress = 100
+        scan_status.completed_at = datetime.utcnow()
         
         # Generate reports automatically
         try:
-            report_generator.generate_all_reports(scan_result)
-        except Exception as e:
-            print(f"Error generating reports: {str(e)}")
+            loop = asyncio.get_running_loop()
+            scan_status.report_files = await loop.run_in_executor(
+                report_executor,
+                report_generator.generate_all_reports,
+                scan_result
+            )
+        except Exception:
+            logger.exception("Error generating reports for scan %s", scan_id)
+        
+        # Results may be evicted from here on, so this only runs once the reports are saved
+        scan_registry.mark_finished(scan_id)
         
     except Exception as e:
+        logger.exception("Scan %s failed", scan_id)
+        
         # Mark as failed
-        active_scans[scan_id].status = "failed"
-        active_scans[scan_id].error_message = str(e)
-        active_scans[scan_id].completed_at = datetime.utcnow()
+        scan_status.status = "failed"
+        scan_status.error_message = str(e)
+        scan_status.completed_at = datetime.utcnow()
+        scan_registry.mark_finished(scan_id)
+
+
+def _configure_logging() -> None:
+    """Route package logs through a queue so formatting and I/O stay off the event loop."""
+    global _log_listener, _log_handler
+    if _log_listener is not None:
+        return
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(
+        logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    _log_listener = QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    
+    _log_handler = QueueHandler(log_queue)
+    package_logger = logging.getLogger("cspm_scanner")
+    package_logger.addHandler(_log_handler)
+    package_logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
 
 
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup."""
+    global scan_semaphore
+    _configure_logging()
+    scan_semaphore = asyncio.Semaphore(settings.max_concurrent_scans)
+    
     # Create reports directory
-    import os
-    os.makedirs(settings.report_output_dir, exist_ok=True)
+    if not os.path.isdir(settings.report_output_dir):
+        await aiofiles.os.makedirs(settings.report_output_dir, exist_ok=True)
+    
+    # Warm up credentials and subscription listing so the first scan skips the handshake.
+    # Listing subscriptions creates the credential and acquires its first token.
+    if not settings.debug:
+        warmup_started = time.perf_counter()
+        try:
+            await auth_manager.list_subscriptions_async()
+        except Exception as e:
+            logger.warning("Azure client warmup failed: %s", e)
+        logger.info("Azure client warmup finished in %.2fs", time.perf_counter() - warmup_started)
     
-    print(f"CSPM Scanner API started on {settings.api_host}:{settings.api_port}")
-    print(f"Reports directory: {settings.report_output_dir}")
+    logger.info("CSPM Scanner API started on %s:%s", settings.api_host, settings.api_port)
+    logger.info("Reports directory: %s", settings.report_output_dir)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown."""
-    print("CSPM Scanner API shutting down...")
+    global _log_listener, _log_handler
+    logger.info("CSPM Scanner API shutting down...")
+    
+    # Cancel scans that are still queued or running
+    for task in list(bg_tasks):
+        task.cancel()
+    await asyncio.gather(*bg_tasks, return_exceptions=True)
+    
+    report_executor.shutdown(wait=True)
+    
+    if _log_listener is not None:
+        logging.getLogger("cspm_scanner").removeHandler(_log_handler)
+        _log_listener.stop()
+        _log_listener = None
+        _log_handler = None
 
 
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Handle HTTP exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": exc.detail,
@@ -345,7 +639,7 @@ async def http_exception_handler(request, exc):
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle general exceptions."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
@@ -360,5 +654,6 @@ if __name__ == "__main__":
         "cspm_scanner.api:app",
         host=settings.api_host,
         port=settings.api_port,
-        reload=settings.debug
+        reload=settings.debug,
+        workers=1 if settings.debug else settings.api_workers
     )
@@ -1,15 +1,28 @@
 """Azure authentication management."""
 
-from typing import Optional
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
 from azure.identity import DefaultAzureCredential, ClientSecretCredential, ManagedIdentityCredential
 from azure.mgmt.resource import SubscriptionClient
-from azure.mgmt.storage import StorageManagementClient
-from azure.mgmt.network import NetworkManagementClient
-from azure.mgmt.keyvault import KeyVaultManagementClient
-from azure.mgmt.compute import ComputeManagementClient
-from azure.mgmt.databricks import DatabricksClient
 from .config import settings
 
+# Resource-specific management SDKs are imported by their client getters, so
+# only the packages for the resource types being scanned are loaded
+if TYPE_CHECKING:
+    from azure.mgmt.compute import ComputeManagementClient
+    from azure.mgmt.databricks import DatabricksClient
+    from azure.mgmt.keyvault import KeyVaultManagementClient
+    from azure.mgmt.network import NetworkManagementClient
+    from azure.mgmt.storage import StorageManagementClient
+
+# Connections pooled per host in the HTTP session shared by all management clients
+_HTTP_POOL_SIZE = 50
+
 
 class AzureAuthManager:
     """Manages Azure authentication and client creation."""
@@ -17,52 +30,114 @@ class AzureAuthManager:
     def __init__(self):
         self._credential = None
         self._subscription_client = None
+        self._transport: Optional[RequestsTransport] = None
+        self._subs_cache: Optional[Tuple[float, list]] = None
+        self._subs_lock = threading.Lock()
+        self._client_cache: Dict[Tuple[str, str], Any] = {}
+        # Reentrant: client creation holds it while fetching the shared credential and transport
+        self._client_lock = threading.RLock()
     
     def get_credential(self):
         """Get Azure credential based on configuration."""
         if self._credential is None:
-            if settings.use_managed_identity:
-                self._credential = ManagedIdentityCredential()
-            elif all([settings.azure_client_id, settings.azure_client_secret, settings.azure_tenant_id]):
-                self._credential = ClientSecretCredential(
-                    client_id=settings.azure_client_id,
-                    client_secret=settings.azure_client_secret,
-                    tenant_id=settings.azure_tenant_id
-                )
-            else:
-                # Use DefaultAzureCredential for development
-                self._credential = DefaultAzureCredential()
+            with self._client_lock:
+                if self._credential is None:
+                    self._credential = self._create_credential()
         
         return self._credential
     
+    def _create_credential(self):
+        """Create the Azure credential selected by the configuration."""
+        if settings.use_managed_identity:
+            return ManagedIdentityCredential()
+        elif all([settings.azure_client_id, settings.azure_client_secret, settings.azure_tenant_id]):
+            return ClientSecretCredential(
+                client_id=settings.azure_client_id,
+                client_secret=settings.azure_client_secret,
+                tenant_id=settings.azure_tenant_id
+            )
+        else:
+            # Use DefaultAzureCredential for development
+            return DefaultAzureCredential()
+    
+    def get_transport(self) -> RequestsTransport:
+        """Get the HTTP transport shared by every management client."""
+        if self._transport is None:
+            with self._client_lock:
+                if self._transport is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=_HTTP_POOL_SIZE, pool_maxsize=_HTTP_POOL_SIZE)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    # Clients must not close the session they share
+                    self._transport = RequestsTransport(session=session, session_owner=False)
+        return self._transport
+    
     def get_subscription_client(self) -> SubscriptionClient:
         """Get subscription management client."""
         if self._subscription_client is None:
-            self._subscription_client = SubscriptionClient(self.get_credential())
+            with self._client_lock:
+                if self._subscription_client is None:
+                    self._subscription_client = SubscriptionClient(
+                        self.get_credential(), transport=self.get_transport()
+                    )
         return self._subscription_client
     
-    def get_storage_client(self, subscription_id: str) -> StorageManagementClient:
+    def _get_client(self, client_class, subscription_id: str):
+        """Get a management client, reusing one per client type and subscription."""
+        key = (client_class.__name__, subscription_id)
+        client = self._client_cache.get(key)
+        if client is None:
+            with self._client_lock:
+                client = self._client_cache.get(key)
+                if client is None:
+                    client = client_class(self.get_credential(), subscription_id, transport=self.get_transport())
+                    self._client_cache[key] = client
+        return client
+    
+    def get_storage_client(self, subscription_id: str) -> "StorageManagementClient":
         """Get storage management client."""
-        return StorageManagementClient(self.get_credential(), subscription_id)
+        from azure.mgmt.storage import StorageManagementClient
+        return self._get_client(StorageManagementClient, subscription_id)
     
-    def get_network_client(self, subscription_id: str) -> NetworkManagementClient:
+    def get_network_client(self, subscription_id: str) -> "NetworkManagementClient":
         """Get network management client."""
-        return NetworkManagementClient(self.get_credential(), subscription_id)
+        from azure.mgmt.network import NetworkManagementClient
+        return self._get_client(NetworkManagementClient, subscription_id)
     
-    def get_keyvault_client(self, subscription_id: str) -> KeyVaultManagementClient:
+    def get_keyvault_client(self, subscription_id: str) -> "KeyVaultManagementClient":
         """Get Key Vault management client."""
-        return KeyVaultManagementClient(self.get_credential(), subscription_id)
+        from azure.mgmt.keyvault import KeyVaultManagementClient
+        return self._get_client(KeyVaultManagementClient, subscription_id)
     
-    def get_compute_client(self, subscription_id: str) -> ComputeManagementClient:
+    def get_compute_client(self, subscription_id: str) -> "ComputeManagementClient":
         """Get compute management client."""
-        return ComputeManagementClient(self.get_credential(), subscription_id)
+        from azure.mgmt.compute import ComputeManagementClient
+        return self._get_client(ComputeManagementClient, subscription_id)
     
-    def get_databricks_client(self, subscription_id: str) -> DatabricksClient:
+    def get_databricks_client(self, subscription_id: str) -> "DatabricksClient":
         """Get Databricks management client."""
-        return DatabricksClient(self.get_credential(), subscription_id)
+        from azure.mgmt.databricks import DatabricksClient
+        return self._get_client(DatabricksClient, subscription_id)
     
     def list_subscriptions(self) -> list:
-        """List all accessible subscriptions."""
+        """List all accessible subscriptions, cached for ``subscriptions_ttl`` seconds."""
+        cached = self._subs_cache
+        if cached is not None and time.monotonic() - cached[0] < settings.subscriptions_ttl:
+            return cached[1]
+        
+        with self._subs_lock:
+            # Another thread may have refreshed the cache while we waited
+            cached = self._subs_cache
+            if cached is not None and time.monotonic() - cached[0] < settings.subscriptions_ttl:
+                return cached[1]
+            
+            subscriptions = self._fetch_subscriptions()
+            self._subs_cache = (time.monotonic(), subscriptions)
+            return subscriptions
+    
+    def _fetch_subscriptions(self) -> list:
+        """Fetch accessible subscriptions from Azure Resource Manager."""
         try:
             client = self.get_subscription_client()
             subscriptions = []
@@ -77,6 +152,18 @@ class AzureAuthManager:
         except Exception as e:
             raise Exception(f"Failed to list subscriptions: {str(e)}")
     
+    async def list_subscriptions_async(self) -> list:
+        """List all accessible subscriptions without blocking the event loop."""
+        return await self.run_sync(self.list_subscriptions)
+    
+    async def validate_access_async(self, subscription_id: str) -> bool:
+        """Validate subscription access without blocking the event loop."""
+        return await self.run_sync(self.validate_access, subscription_id)
+    
+    async def run_sync(self, fn, *args):
+        """Run a blocking Azure SDK call in a worker thread."""
+        return await asyncio.to_thread(fn, *args)
+    
     def validate_access(self, subscription_id: str) -> bool:
         """Validate access to a specific subscription."""
         try:
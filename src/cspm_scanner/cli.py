@@ -1,7 +1,9 @@
 """Command-line interface for CSPM Scanner."""
 
 import asyncio
+import bisect
 import sys
+from datetime import datetime, timedelta
 from typing import Optional, List
 from pathlib import Path
 
@@ -28,6 +30,19 @@ cli_app = typer.Typer(
 # Console for rich output
 console = Console()
 
+# Lookup tables for risk and severity display
+_RISK_THRESHOLDS = (20, 40, 60, 80)
+_RISK_LABELS = ("Minimal", "Low", "Medium", "High", "Critical")
+_RISK_COLOR_THRESHOLDS = (40, 60, 80)
+_RISK_COLORS = ("green", "blue", "yellow", "red")
+_SEVERITY_COLORS = {
+    "critical": "red",
+    "high": "yellow",
+    "medium": "blue",
+    "low": "green",
+    "info": "cyan"
+}
+
 
 @cli_app.command()
 def scan(
@@ -278,12 +293,12 @@ def cleanup_reports(
         if dry_run:
             # Just show what would be deleted
             reports = report_gen.list_reports()
-            import time
-            cutoff_time = time.time() - (days * 24 * 60 * 60)
+            # Report timestamps are local ISO strings, so compare against local time
+            cutoff = datetime.now() - timedelta(days=days)
             
             old_reports = [
-                r for r in reports 
-                if time.mktime(time.strptime(r['created'][:19], "%Y-%m-%dT%H:%M:%S")) < cutoff_time
+                r for r in reports
+                if datetime.fromisoformat(r['created']) < cutoff
             ]
             
             console.print(f"[yellow]Dry run: {len(old_reports)} reports would be deleted[/yellow]")
@@ -362,40 +377,17 @@ def _display_scan_results(scan_result, verbose: bool = False):
 
 def _get_risk_level(score: int) -> str:
     """Get risk level description from score."""
-    if score >= 80:
-        return "Critical"
-    elif score >= 60:
-        return "High"
-    elif score >= 40:
-        return "Medium"
-    elif score >= 20:
-        return "Low"
-    else:
-        return "Minimal"
+    return _RISK_LABELS[bisect.bisect_right(_RISK_THRESHOLDS, score)]
 
 
 def _get_risk_color(score: int) -> str:
     """Get color for risk score."""
-    if score >= 80:
-        return "red"
-    elif score >= 60:
-        return "yellow"
-    elif score >= 40:
-        return "blue"
-    else:
-        return "green"
+    return _RISK_COLORS[bisect.bisect_right(_RISK_COLOR_THRESHOLDS, score)]
 
 
 def _get_severity_color(severity: str) -> str:
-    """Get color for severity level."""
-    colors = {
-        "critical": "red",
-        "high": "yellow",
-        "medium": "blue",
-        "low": "green",
-        "info": "cyan"
-    }
-    return colors.get(severity.lower(), "white")
+    """Get color for a lowercase severity level."""
+    return _SEVERITY_COLORS.get(severity, "white")
 
 
 def main():
@@ -1,13 +1,21 @@
 """Configuration management for CSPM Scanner."""
 
-import os
+from functools import lru_cache
 from typing import Optional
-from pydantic import BaseSettings
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings."""
     
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="ignore",
+        frozen=True
+    )
+    
     # Azure Authentication
     azure_client_id: Optional[str] = None
     azure_client_secret: Optional[str] = None
@@ -18,16 +26,27 @@ class Settings(BaseSettings):
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    # Scan state lives in each worker process; keep one worker unless scans are stored externally
+    api_workers: int = 1
     debug: bool = False
     
     # Report Configuration
     report_output_dir: str = "./reports"
     max_concurrent_scans: int = 10
+    max_concurrent_subscriptions: int = 16
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    # Scan Tracking
+    max_active_scans: int = 1000
+    completed_scan_cache: int = 100
+    scan_retention_seconds: int = 86400
+    subscriptions_ttl: int = 300
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings instance."""
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
+settings = get_settings()
@@ -1,9 +1,18 @@
 """Data models for CSPM Scanner."""
 
+import dataclasses
+import sys
+from array import array
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Any, Tuple
+from pydantic import VERSION as PYDANTIC_VERSION, BaseModel, Field, PrivateAttr, computed_field
+
+if not PYDANTIC_VERSION.startswith("2."):
+    raise ImportError(f"pydantic>=2 is required, found {PYDANTIC_VERSION}")
+
+# Slotted dataclasses need Python 3.10+
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
 
 class SeverityLevel(str, Enum):
@@ -13,6 +22,21 @@ class SeverityLevel(str, Enum):
     MEDIUM = "medium"
     LOW = "low"
     INFO = "info"
+    
+    @property
+    def weight(self) -> int:
+        """Relative weight of the severity, higher is more severe."""
+        return _SEVERITY_WEIGHTS[self]
+
+
+_SEVERITY_VALUES = tuple(severity.value for severity in SeverityLevel)
+_SEVERITY_WEIGHTS = {
+    SeverityLevel.CRITICAL: 4,
+    SeverityLevel.HIGH: 3,
+    SeverityLevel.MEDIUM: 2,
+    SeverityLevel.LOW: 1,
+    SeverityLevel.INFO: 0
+}
 
 
 class ResourceType(str, Enum):
@@ -25,22 +49,31 @@ class ResourceType(str, Enum):
     DATABRICKS_WORKSPACE = "Microsoft.Databricks/workspaces"
 
 
-class SecurityFinding(BaseModel):
+@dataclasses.dataclass(frozen=True, **_DATACLASS_SLOTS)
+class SecurityFinding:
     """Individual security finding."""
-    id: str = Field(..., description="Unique finding identifier")
-    resource_id: str = Field(..., description="Azure resource ID")
-    resource_name: str = Field(..., description="Resource name")
-    resource_type: ResourceType = Field(..., description="Resource type")
-    subscription_id: str = Field(..., description="Azure subscription ID")
-    resource_group: str = Field(..., description="Resource group name")
-    location: str = Field(..., description="Azure region")
-    title: str = Field(..., description="Finding title")
-    description: str = Field(..., description="Detailed description")
-    severity: SeverityLevel = Field(..., description="Finding severity")
-    recommendation: str = Field(..., description="Remediation recommendation")
-    risk_score: int = Field(..., ge=0, le=100, description="Risk score (0-100)")
-    metadata: Dict[str, Any] = Field(default_factory=dict, description="Additional metadata")
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    id: str
+    resource_id: str
+    resource_name: str
+    resource_type: ResourceType
+    subscription_id: str
+    resource_group: str
+    location: str
+    title: str
+    description: str
+    severity: SeverityLevel
+    recommendation: str
+    risk_score: int
+    metadata: Dict[str, Any] = dataclasses.field(default_factory=dict)
+    timestamp: Optional[datetime] = None  # Set by the scanner that emits the finding
+    
+    def __post_init__(self):
+        if not 0 <= self.risk_score <= 100:
+            raise ValueError(f"risk_score must be between 0 and 100, got {self.risk_score}")
+    
+    def model_dump(self) -> Dict[str, Any]:
+        """Return the finding as a dict, mirroring the pydantic model API."""
+        return dataclasses.asdict(self)
 
 
 class ScanResult(BaseModel):
@@ -50,10 +83,57 @@ class ScanResult(BaseModel):
     scan_timestamp: datetime = Field(default_factory=datetime.utcnow)
     total_resources_scanned: int = Field(..., description="Total resources scanned")
     total_findings: int = Field(..., description="Total security findings")
-    findings_by_severity: Dict[SeverityLevel, int] = Field(default_factory=dict)
+    severity_counts: Tuple[int, int, int, int, int] = Field(
+        (0, 0, 0, 0, 0),
+        exclude=True,
+        description="Finding counts ordered critical, high, medium, low, info"
+    )
     findings: List[SecurityFinding] = Field(default_factory=list)
     risk_score: int = Field(..., ge=0, le=100, description="Overall risk score")
     scan_duration_seconds: Optional[float] = Field(None, description="Scan duration in seconds")
+    
+    _columns: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    _severity_buckets: Optional[Dict[SeverityLevel, List[SecurityFinding]]] = PrivateAttr(default=None)
+    _risk_summary: Optional[Dict[str, Any]] = PrivateAttr(default=None)  # Filled in by the JSON reporter
+    
+    @computed_field
+    @property
+    def findings_by_severity(self) -> Dict[str, int]:
+        """Finding counts keyed by severity value."""
+        return dict(zip(_SEVERITY_VALUES, self.severity_counts))
+    
+    def get_columns(self) -> Dict[str, Any]:
+        """Return per-field columns of the findings, built in a single pass and cached."""
+        if self._columns is None:
+            resource_types: List[str] = []
+            locations: List[str] = []
+            severities: List[str] = []
+            risk_scores = array('i')
+            
+            for finding in self.findings:
+                resource_types.append(finding.resource_type.value)
+                locations.append(finding.location)
+                severities.append(finding.severity.value)
+                risk_scores.append(finding.risk_score)
+            
+            self._columns = {
+                "resource_type": resource_types,
+                "location": locations,
+                "severity": severities,
+                "risk_score": risk_scores
+            }
+        
+        return self._columns
+    
+    def get_severity_buckets(self) -> Dict[SeverityLevel, List[SecurityFinding]]:
+        """Return findings grouped by severity, most severe first, built once and cached."""
+        if self._severity_buckets is None:
+            buckets: Dict[SeverityLevel, List[SecurityFinding]] = {severity: [] for severity in SeverityLevel}
+            for finding in self.findings:
+                buckets[finding.severity].append(finding)
+            self._severity_buckets = buckets
+        
+        return self._severity_buckets
 
 
 class ScanRequest(BaseModel):
@@ -71,3 +151,5 @@ class ScanStatus(BaseModel):
     started_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = Field(None)
     error_message: Optional[str] = Field(None)
+    result: Optional[ScanResult] = Field(None, exclude=True, description="Result of a completed scan")
+    report_files: Dict[str, str] = Field(default_factory=dict, exclude=True, description="Generated report paths by format")
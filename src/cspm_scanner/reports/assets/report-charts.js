@@ -0,0 +1,63 @@
+// Chart rendering shared by all CSPM HTML reports.
+// Each report sets window.__reportData before this script runs.
+(function () {
+    const data = window.__reportData;
+
+    // Severity Distribution Chart
+    const severityCtx = document.getElementById('severityChart').getContext('2d');
+    new Chart(severityCtx, {
+        type: 'doughnut',
+        data: {
+            labels: ['Critical', 'High', 'Medium', 'Low', 'Info'],
+            datasets: [{
+                data: data.severity,
+                backgroundColor: [
+                    '#e74c3c',
+                    '#f39c12',
+                    '#f1c40f',
+                    '#2ecc71',
+                    '#3498db'
+                ]
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                title: {
+                    display: true,
+                    text: 'Findings by Severity'
+                }
+            }
+        }
+    });
+
+    // Resource Type Chart
+    const resourceTypeCtx = document.getElementById('resourceTypeChart').getContext('2d');
+    new Chart(resourceTypeCtx, {
+        type: 'bar',
+        data: {
+            labels: data.labels,
+            datasets: [{
+                label: 'Number of Findings',
+                data: data.values,
+                backgroundColor: '#3498db'
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                title: {
+                    display: true,
+                    text: 'Findings by Resource Type'
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        }
+    });
+})();
@@ -1,72 +1,69 @@
 """HTML report generation for CSPM Scanner."""
 
+import base64
+import hashlib
 import os
+import re
+from collections import Counter, namedtuple
 from datetime import datetime
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Dict, Any, Optional, Set
+
+import orjson
+from jinja2 import Environment, FileSystemBytecodeCache, PackageLoader
 
 from ..models import ScanResult, SecurityFinding, SeverityLevel
 from ..risk_scoring import risk_engine
 
 
-class HTMLReporter:
-    """Generates HTML security reports with interactive charts."""
-    
-    def __init__(self, output_dir: str = "./reports"):
-        self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
-    
-    def generate_report(self, scan_result: ScanResult) -> str:
-        """Generate a comprehensive HTML security report."""
-        html_content = self._build_html_report(scan_result)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"cspm_report_{scan_result.subscription_id}_{timestamp}.html"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        return filepath
-    
-    def _build_html_report(self, scan_result: ScanResult) -> str:
-        """Build the complete HTML report."""
-        risk_summary = risk_engine.generate_risk_summary(scan_result.findings)
-        
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Azure Security Posture Report - {scan_result.subscription_id}</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        {self._get_css_styles()}
-    </style>
-</head>
-<body>
-    <div class="container">
-        {self._build_header(scan_result)}
-        {self._build_executive_summary(scan_result, risk_summary)}
-        {self._build_risk_analysis(risk_summary)}
-        {self._build_findings_section(scan_result.findings)}
-        {self._build_resource_analysis(scan_result.findings)}
-        {self._build_recommendations(scan_result.findings)}
-        {self._build_footer()}
-    </div>
-    
-    <script>
-        {self._get_chart_scripts(scan_result, risk_summary)}
-    </script>
-</body>
-</html>
-        """
-        
-        return html_template
-    
-    def _get_css_styles(self) -> str:
-        """Return CSS styles for the report."""
-        return """
+ReportStats = namedtuple(
+    'ReportStats',
+    'by_severity by_resource_type by_location top_risks prioritized recommendations'
+)
+
+_SEVERITY_CSS = {severity: f"severity-{severity.value}" for severity in SeverityLevel}
+_SEVERITY_LABEL = {severity: severity.value for severity in SeverityLevel}
+
+_LOW_EFFORT_KEYWORDS = ("enable", "disable", "configure", "set")
+_MEDIUM_EFFORT_KEYWORDS = ("implement", "deploy", "create")
+_HIGH_EFFORT_KEYWORDS = ("redesign", "migrate", "restructure")
+
+def _orjson_dumps(obj: Any, **kwargs: Any) -> str:
+    """JSON encoder for the template ``tojson`` filter."""
+    return orjson.dumps(obj).decode()
+
+
+def _hashed_name(filename: str, content: bytes) -> str:
+    """Insert a short hash of an asset's content before its extension."""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+_ASSETS_DIR = Path(__file__).parent / "assets"
+
+# Content-hashed, so a changed asset gets a new file instead of reusing a stale one
+_CHART_SCRIPT_SOURCE = (_ASSETS_DIR / "report-charts.js").read_bytes()
+_CHART_SCRIPT = _hashed_name("report-charts.js", _CHART_SCRIPT_SOURCE)
+# A data URI keeps the script deferred, so it still runs after Chart.js in standalone reports
+_CHART_SCRIPT_DATA_URI = "data:text/javascript;base64," + base64.b64encode(_CHART_SCRIPT_SOURCE).decode("ascii")
+
+# Shared assets written next to the reports, in any version
+_ASSET_NAME_RE = re.compile(r"report-charts(\.[0-9a-f]{12})?\.js|cspm_report(\.[0-9a-f]{12})?\.css")
+_STYLESHEET_TAG_RE = re.compile(r'<link rel="stylesheet" href="cspm_report(\.[0-9a-f]{12})?\.css">')
+_CHART_SCRIPT_TAG_RE = re.compile(r'src="report-charts(\.[0-9a-f]{12})?\.js"')
+
+
+def is_report_asset(filename: str) -> bool:
+    """Check if a file in the report directory is a shared asset rather than a report."""
+    return _ASSET_NAME_RE.fullmatch(filename) is not None
+
+
+def report_asset_references(html_content: str) -> Set[str]:
+    """Return the filenames of the shared assets a report links."""
+    return {match.group(0) for match in _ASSET_NAME_RE.finditer(html_content)}
+
+
+_CSS_STYLES = """
         * {
             margin: 0;
             padding: 0;
@@ -263,346 +260,149 @@ class HTMLReporter:
             }
         }
         """
+
+
+def _minify_css(css: str) -> str:
+    """Collapse whitespace in a stylesheet."""
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", css).strip()
+
+
+_CSS_MINIFIED = _minify_css(_CSS_STYLES)
+_STYLESHEET = _hashed_name("cspm_report.css", _CSS_MINIFIED.encode('utf-8'))
+
+
+def is_current_report_asset(filename: str) -> bool:
+    """Check if an asset filename is the version new reports link."""
+    return filename == _STYLESHEET or filename == _CHART_SCRIPT
+
+
+class HTMLReporter:
+    """Generates HTML security reports with interactive charts."""
     
-    def _build_header(self, scan_result: ScanResult) -> str:
-        """Build the report header."""
-        return f"""
-        <div class="header">
-            <h1>Azure Security Posture Report</h1>
-            <div class="subtitle">
-                Subscription: {scan_result.subscription_name or scan_result.subscription_id}<br>
-                Scan Date: {scan_result.scan_timestamp.strftime('%B %d, %Y at %I:%M %p')}<br>
-                Duration: {scan_result.scan_duration_seconds:.2f} seconds
-            </div>
-        </div>
-        """
+    def __init__(self, output_dir: str = "./reports"):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._env = Environment(
+            loader=PackageLoader("cspm_scanner.reports", "templates"),
+            autoescape=True,
+            bytecode_cache=FileSystemBytecodeCache()
+        )
+        self._env.policies["json.dumps_function"] = _orjson_dumps
+        self._env.policies["json.dumps_kwargs"] = {}
+        self._template = self._env.get_template(
+            "report.html.j2",
+            globals={
+                "severity_css": _SEVERITY_CSS,
+                "severity_label": _SEVERITY_LABEL
+            }
+        )
     
-    def _build_executive_summary(self, scan_result: ScanResult, risk_summary: Dict) -> str:
-        """Build the executive summary section."""
-        risk_level = risk_engine.get_risk_level(scan_result.risk_score)
-        risk_class = f"risk-{risk_level.lower()}"
-        
-        return f"""
-        <div class="section">
-            <h2>Executive Summary</h2>
-            
-            <div class="risk-score">
-                <div class="risk-score-circle {risk_class}">
-                    {scan_result.risk_score}
-                </div>
-                <div style="margin-top: 20px;">
-                    <h3>Overall Risk Level: {risk_level}</h3>
-                    <p>Based on {scan_result.total_findings} security findings across {scan_result.total_resources_scanned} resources</p>
-                </div>
-            </div>
-            
-            <div class="metrics-grid">
-                <div class="metric-card">
-                    <div class="metric-value">{scan_result.total_resources_scanned}</div>
-                    <div class="metric-label">Resources Scanned</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{scan_result.total_findings}</div>
-                    <div class="metric-label">Total Findings</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{scan_result.findings_by_severity.get('critical', 0)}</div>
-                    <div class="metric-label">Critical Issues</div>
-                </div>
-                <div class="metric-card">
-                    <div class="metric-value">{scan_result.findings_by_severity.get('high', 0)}</div>
-                    <div class="metric-label">High Issues</div>
-                </div>
-            </div>
-        </div>
-        """
+    def generate_report(self, scan_result: ScanResult, *, timestamp: Optional[str] = None) -> str:
+        """Generate a comprehensive HTML security report."""
+        filepath = self._report_path(scan_result, timestamp)
+        self._ensure_assets()
+        
+        # Stream rendered chunks straight to disk instead of building one large string
+        stream = self._template.stream(self._build_context(scan_result))
+        stream.enable_buffering(size=64)
+        stream.dump(filepath, encoding='utf-8')
+        
+        return filepath
     
-    def _build_risk_analysis(self, risk_summary: Dict) -> str:
-        """Build the risk analysis section."""
-        return f"""
-        <div class="section">
-            <h2>Risk Analysis</h2>
-            
-            <div class="chart-container">
-                <canvas id="severityChart"></canvas>
-            </div>
-            
-            <div class="chart-container">
-                <canvas id="resourceTypeChart"></canvas>
-            </div>
-            
-            <h3>Top Security Risks</h3>
-            <table class="findings-table">
-                <thead>
-                    <tr>
-                        <th>Risk</th>
-                        <th>Resource</th>
-                        <th>Severity</th>
-                        <th>Score</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {self._build_top_risks_table(risk_summary.get('top_risks', []))}
-                </tbody>
-            </table>
-        </div>
-        """
+    def render_report(self, scan_result: ScanResult) -> bytes:
+        """Render a self-contained HTML report as UTF-8 bytes, with its assets inlined."""
+        return self._template.render(self._build_context(scan_result, inline_assets=True)).encode('utf-8')
     
-    def _build_findings_section(self, findings: List[SecurityFinding]) -> str:
-        """Build the detailed findings section."""
-        findings_html = ""
-        for finding in findings[:50]:  # Limit to first 50 findings
-            severity_class = f"severity-{finding.severity}"
-            
-            findings_html += f"""
-            <tr>
-                <td><span class="severity-badge {severity_class}">{finding.severity}</span></td>
-                <td>{finding.title}</td>
-                <td>{finding.resource_name}</td>
-                <td>{finding.resource_type}</td>
-                <td>{finding.risk_score}</td>
-                <td>{finding.recommendation}</td>
-            </tr>
-            """
-        
-        return f"""
-        <div class="section">
-            <h2>Security Findings</h2>
-            <p>Showing {min(50, len(findings))} of {len(findings)} total findings</p>
-            
-            <table class="findings-table">
-                <thead>
-                    <tr>
-                        <th>Severity</th>
-                        <th>Issue</th>
-                        <th>Resource</th>
-                        <th>Type</th>
-                        <th>Risk Score</th>
-                        <th>Recommendation</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {findings_html}
-                </tbody>
-            </table>
-        </div>
-        """
+    def inline_assets(self, html_content: str) -> str:
+        """Make a report written to disk self-contained by inlining the assets it links."""
+        html_content = _STYLESHEET_TAG_RE.sub(lambda match: f"<style>{_CSS_MINIFIED}</style>", html_content, count=1)
+        return _CHART_SCRIPT_TAG_RE.sub(f'src="{_CHART_SCRIPT_DATA_URI}"', html_content)
     
-    def _build_resource_analysis(self, findings: List[SecurityFinding]) -> str:
-        """Build the resource analysis section."""
-        from collections import Counter
-        
-        resource_types = Counter(finding.resource_type for finding in findings)
-        locations = Counter(finding.location for finding in findings)
-        
-        resource_types_html = "".join([
-            f"<tr><td>{resource_type}</td><td>{count}</td></tr>"
-            for resource_type, count in resource_types.most_common(10)
-        ])
-        
-        locations_html = "".join([
-            f"<tr><td>{location}</td><td>{count}</td></tr>"
-            for location, count in locations.most_common(10)
-        ])
-        
-        return f"""
-        <div class="section">
-            <h2>Resource Analysis</h2>
-            
-            <div style="display: grid; grid-template-columns: 1fr 1fr; gap: 30px;">
-                <div>
-                    <h3>Findings by Resource Type</h3>
-                    <table class="findings-table">
-                        <thead>
-                            <tr>
-                                <th>Resource Type</th>
-                                <th>Findings</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {resource_types_html}
-                        </tbody>
-                    </table>
-                </div>
-                
-                <div>
-                    <h3>Findings by Location</h3>
-                    <table class="findings-table">
-                        <thead>
-                            <tr>
-                                <th>Location</th>
-                                <th>Findings</th>
-                            </tr>
-                        </thead>
-                        <tbody>
-                            {locations_html}
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-        """
+    def _report_path(self, scan_result: ScanResult, timestamp: Optional[str] = None) -> str:
+        """Return a timestamped output path for a subscription's report."""
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"cspm_report_{scan_result.subscription_id}_{timestamp}.html"
+        return str(self.output_dir / filename)
     
-    def _build_recommendations(self, findings: List[SecurityFinding]) -> str:
-        """Build the recommendations section."""
-        prioritized_findings = risk_engine.prioritize_findings(findings)
-        recommendations = risk_engine._generate_recommendations(findings)
-        
-        recommendations_html = "".join([
-            f'<li class="recommendations-list">{rec}</li>'
-            for rec in recommendations
-        ])
-        
-        return f"""
-        <div class="section">
-            <h2>Recommendations</h2>
-            
-            <h3>Priority Actions</h3>
-            <ul class="recommendations-list">
-                {recommendations_html}
-            </ul>
-            
-            <h3>Top 10 Findings to Address</h3>
-            <table class="findings-table">
-                <thead>
-                    <tr>
-                        <th>Priority</th>
-                        <th>Resource</th>
-                        <th>Issue</th>
-                        <th>Effort</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {self._build_priority_table(prioritized_findings[:10])}
-                </tbody>
-            </table>
-        </div>
-        """
+    def _ensure_assets(self) -> None:
+        """Write the shared stylesheet and chart script next to the reports if missing."""
+        stylesheet = self.output_dir / _STYLESHEET
+        if not stylesheet.exists():
+            stylesheet.write_text(_CSS_MINIFIED, encoding='utf-8')
+        
+        chart_script = self.output_dir / _CHART_SCRIPT
+        if not chart_script.exists():
+            chart_script.write_bytes(_CHART_SCRIPT_SOURCE)
     
-    def _build_footer(self) -> str:
-        """Build the report footer."""
-        return f"""
-        <div class="footer">
-            <p>Generated by Cloud Security Posture Scanner v1.0.0</p>
-            <p>Report generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-        </div>
-        """
+    def _build_html_report(self, scan_result: ScanResult) -> str:
+        """Build the complete HTML report."""
+        return self._template.render(self._build_context(scan_result))
     
-    def _build_top_risks_table(self, top_risks: List[Dict]) -> str:
-        """Build the top risks table HTML."""
-        rows = ""
-        for risk in top_risks:
-            severity_class = f"severity-{risk['severity']}"
-            rows += f"""
-            <tr>
-                <td>{risk['title']}</td>
-                <td>{risk['resource_name']}</td>
-                <td><span class="severity-badge {severity_class}">{risk['severity']}</span></td>
-                <td>{risk['risk_score']}</td>
-            </tr>
-            """
-        return rows
+    def _build_context(self, scan_result: ScanResult, inline_assets: bool = False) -> Dict[str, Any]:
+        """Collect the values rendered by the report template."""
+        stats = self._compute_stats(scan_result)
+        
+        priority_rows = [
+            (
+                "P1" if finding.severity.weight >= 3 else "P2",
+                finding,
+                self._estimate_remediation_effort(finding)
+            )
+            for finding in stats.prioritized
+        ]
+        
+        return {
+            "scan_result": scan_result,
+            "top_risks": stats.top_risks,
+            "risk_level": risk_engine.get_risk_level(scan_result.risk_score),
+            "findings": scan_result.findings[:50],  # Limit to first 50 findings
+            "resource_types": stats.by_resource_type.most_common(10),
+            "locations": stats.by_location.most_common(10),
+            "recommendations": stats.recommendations,
+            "priority_rows": priority_rows,
+            "chart_data": {
+                "severity": list(scan_result.severity_counts),
+                "labels": [severity.value for severity in SeverityLevel],
+                "values": [stats.by_severity[severity] for severity in SeverityLevel]
+            },
+            "inline_assets": inline_assets,
+            "stylesheet": _CSS_MINIFIED if inline_assets else _STYLESHEET,
+            "chart_script_src": _CHART_SCRIPT_DATA_URI if inline_assets else _CHART_SCRIPT,
+            "generated_at": datetime.now()
+        }
     
-    def _build_priority_table(self, prioritized_findings: List[SecurityFinding]) -> str:
-        """Build the priority recommendations table."""
-        rows = ""
-        for i, finding in enumerate(prioritized_findings, 1):
-            priority = "P1" if finding.severity in ["critical", "high"] else "P2"
-            effort = self._estimate_remediation_effort(finding)
-            
-            rows += f"""
-            <tr>
-                <td>{priority}</td>
-                <td>{finding.resource_name}</td>
-                <td>{finding.title}</td>
-                <td>{effort}</td>
-            </tr>
-            """
-        return rows
+    def _compute_stats(self, scan_result: ScanResult) -> ReportStats:
+        """Compute every aggregate the report needs from one set of finding columns."""
+        columns = scan_result.get_columns()
+        by_severity = Counter(columns['severity'])
+        by_resource_type = Counter(columns['resource_type'])
+        
+        prioritized = risk_engine.top_k_findings(scan_result.findings, 10)
+        
+        return ReportStats(
+            by_severity=by_severity,
+            by_resource_type=by_resource_type,
+            by_location=Counter(columns['location']),
+            top_risks=prioritized[:5],
+            prioritized=prioritized,
+            recommendations=risk_engine.recommendations_from_counts(
+                by_severity, by_resource_type, len(scan_result.findings)
+            )
+        )
     
     def _estimate_remediation_effort(self, finding: SecurityFinding) -> str:
         """Estimate remediation effort."""
-        low_effort_keywords = ["enable", "disable", "configure", "set"]
-        medium_effort_keywords = ["implement", "deploy", "create"]
-        high_effort_keywords = ["redesign", "migrate", "restructure"]
-        
         title_lower = finding.title.lower()
         
-        if any(keyword in title_lower for keyword in low_effort_keywords):
-            return "Low"
-        elif any(keyword in title_lower for keyword in medium_effort_keywords):
-            return "Medium"
-        elif any(keyword in title_lower for keyword in high_effort_keywords):
-            return "High"
-        else:
-            return "Medium"
-    
-    def _get_chart_scripts(self, scan_result: ScanResult, risk_summary: Dict) -> str:
-        """Return JavaScript for charts."""
-        severity_data = scan_result.findings_by_severity
-        
-        return f"""
-        // Severity Distribution Chart
-        const severityCtx = document.getElementById('severityChart').getContext('2d');
-        new Chart(severityCtx, {{
-            type: 'doughnut',
-            data: {{
-                labels: ['Critical', 'High', 'Medium', 'Low', 'Info'],
-                datasets: [{{
-                    data: [
-                        {severity_data.get('critical', 0)},
-                        {severity_data.get('high', 0)},
-                        {severity_data.get('medium', 0)},
-                        {severity_data.get('low', 0)},
-                        {severity_data.get('info', 0)}
-                    ],
-                    backgroundColor: [
-                        '#e74c3c',
-                        '#f39c12',
-                        '#f1c40f',
-                        '#2ecc71',
-                        '#3498db'
-                    ]
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{
-                    title: {{
-                        display: true,
-                        text: 'Findings by Severity'
-                    }}
-                }}
-            }}
-        }});
-        
-        // Resource Type Chart
-        const resourceTypeCtx = document.getElementById('resourceTypeChart').getContext('2d');
-        new Chart(resourceTypeCtx, {{
-            type: 'bar',
-            data: {{
-                labels: {list(risk_summary.get('findings_by_severity', {}).keys())},
-                datasets: [{{
-                    label: 'Number of Findings',
-                    data: {list(risk_summary.get('findings_by_severity', {}).values())},
-                    backgroundColor: '#3498db'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {{
-                    title: {{
-                        display: true,
-                        text: 'Findings by Resource Type'
-                    }}
-                }},
-                scales: {{
-                    y: {{
-                        beginAtZero: true
-                    }}
-                }}
-            }}
-        }});
-        """
+        for keyword in _LOW_EFFORT_KEYWORDS:
+            if keyword in title_lower:
+                return "Low"
+        for keyword in _MEDIUM_EFFORT_KEYWORDS:
+            if keyword in title_lower:
+                return "Medium"
+        for keyword in _HIGH_EFFORT_KEYWORDS:
+            if keyword in title_lower:
+                return "High"
+        
+        return "Medium"
@@ -1,14 +1,92 @@
 """JSON report generation for CSPM Scanner."""
 
-import json
+import heapq
 import os
+import re
+from collections import Counter, defaultdict
 from datetime import datetime
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 
-from ..models import ScanResult, SecurityFinding
+import orjson
+from pydantic import TypeAdapter
+
+from ..models import ScanResult, SecurityFinding, SeverityLevel
 from ..risk_scoring import risk_engine
 
 
+# Serializes whole finding lists in one pydantic-core call
+_FINDINGS_ADAPTER = TypeAdapter(List[SecurityFinding])
+
+# Reports with more findings than this are streamed to disk finding by finding
+_STREAM_THRESHOLD = 5000
+
+
+def _dump_json(data: Any) -> bytes:
+    """Serialize report data to indented UTF-8 JSON. Datetimes are written as ISO 8601."""
+    return orjson.dumps(
+        data,
+        default=str,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    )
+
+
+def _dump_compact_json(data: Any) -> bytes:
+    """Serialize report data to compact UTF-8 JSON."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+# Title patterns and the controls they map to in each compliance standard
+_COMPLIANCE_RULES = (
+    (
+        re.compile(r"^(?=.*public)(?=.*access)", re.IGNORECASE | re.DOTALL),
+        {
+            "CIS Controls": "CIS Control 12 - Network Infrastructure Management",
+            "NIST Cybersecurity Framework": "PR.AC - Access Control",
+            "ISO 27001": "A.9 - Access Control",
+            "SOC 2": "CC6.1 - Logical Access Controls"
+        }
+    ),
+    (
+        re.compile(r"encryption", re.IGNORECASE),
+        {
+            "CIS Controls": "CIS Control 14 - Controlled Access Based on the Need to Know",
+            "NIST Cybersecurity Framework": "PR.DS - Data Security",
+            "ISO 27001": "A.8 - Asset Management",
+            "SOC 2": "CC6.1 - Logical Access Controls"
+        }
+    ),
+    (
+        re.compile(r"network|firewall", re.IGNORECASE),
+        {
+            "CIS Controls": "CIS Control 12 - Network Infrastructure Management",
+            "NIST Cybersecurity Framework": "PR.AC - Access Control",
+            "ISO 27001": "A.13 - Communications Security",
+            "SOC 2": "CC6.1 - Logical Access Controls"
+        }
+    )
+)
+
+
+@lru_cache(maxsize=2048)
+def _effort_for_title(title: str) -> str:
+    """Estimate remediation effort from a finding title."""
+    low_effort_keywords = ["enable", "disable", "configure", "set"]
+    medium_effort_keywords = ["implement", "deploy", "create"]
+    high_effort_keywords = ["redesign", "migrate", "restructure"]
+    
+    title_lower = title.lower()
+    
+    if any(keyword in title_lower for keyword in low_effort_keywords):
+        return "Low (1-2 hours)"
+    elif any(keyword in title_lower for keyword in medium_effort_keywords):
+        return "Medium (4-8 hours)"
+    elif any(keyword in title_lower for keyword in high_effort_keywords):
+        return "High (1-3 days)"
+    else:
+        return "Medium (4-8 hours)"
+
+
 class JSONReporter:
     """Generates JSON security reports."""
     
@@ -16,21 +94,55 @@ class JSONReporter:
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
     
-    def generate_report(self, scan_result: ScanResult) -> str:
+    def generate_report(self, scan_result: ScanResult, *, timestamp: Optional[str] = None) -> str:
         """Generate a comprehensive JSON security report."""
-        report_data = self._build_report_data(scan_result)
-        
         # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"cspm_report_{scan_result.subscription_id}_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
         
+        if len(scan_result.findings) > _STREAM_THRESHOLD:
+            self._stream_report(scan_result, filepath)
+            return filepath
+        
         # Write JSON report
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(report_data, f, indent=2, default=str, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(self.render_report(scan_result))
         
         return filepath
     
+    def _stream_report(self, scan_result: ScanResult, filepath: str) -> None:
+        """Write a large report one finding at a time, in the same layout render_report produces."""
+        report_data = self._build_report_data(scan_result, include_findings=False)
+        
+        # orjson never emits raw newlines inside strings, so nested values are
+        # re-indented by prefixing each of their lines
+        with open(filepath, 'wb', buffering=1 << 20) as f:
+            f.write(b"{")
+            for index, (key, value) in enumerate(report_data.items()):
+                f.write(b",\n  " if index else b"\n  ")
+                f.write(_dump_json(key))
+                f.write(b": ")
+                
+                if key != "findings":
+                    f.write(_dump_json(value).replace(b"\n", b"\n  "))
+                    continue
+                
+                if not scan_result.findings:
+                    f.write(b"[]")
+                    continue
+                
+                f.write(b"[")
+                for position, finding in enumerate(scan_result.findings):
+                    f.write(b",\n    " if position else b"\n    ")
+                    f.write(_dump_json(self._format_finding(finding)).replace(b"\n", b"\n    "))
+                f.write(b"\n  ]")
+            f.write(b"\n}" if report_data else b"}")
+    
+    def render_report(self, scan_result: ScanResult) -> bytes:
+        """Render a comprehensive JSON security report as UTF-8 bytes."""
+        return _dump_json(self._build_report_data(scan_result))
+    
     def generate_summary_report(self, scan_results: List[ScanResult]) -> str:
         """Generate a summary report for multiple scans."""
         summary_data = self._build_summary_data(scan_results)
@@ -39,15 +151,15 @@ class JSONReporter:
         filename = f"cspm_summary_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=2, default=str, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(_dump_compact_json(summary_data))
         
         return filepath
     
     def export_findings(self, findings: List[SecurityFinding], format_type: str = "detailed") -> str:
         """Export findings in various JSON formats."""
         if format_type == "detailed":
-            data = [finding.dict() for finding in findings]
+            data = _FINDINGS_ADAPTER.dump_python(findings)
         elif format_type == "summary":
             data = [
                 {
@@ -70,19 +182,25 @@ class JSONReporter:
         filename = f"findings_{format_type}_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, default=str, ensure_ascii=False)
+        # Summary and compliance exports are read by tooling, so skip the indentation
+        dump = _dump_json if format_type == "detailed" else _dump_compact_json
+        with open(filepath, 'wb') as f:
+            f.write(dump(data))
         
         return filepath
     
-    def _build_report_data(self, scan_result: ScanResult) -> Dict[str, Any]:
-        """Build comprehensive report data structure."""
-        risk_summary = risk_engine.generate_risk_summary(scan_result.findings)
+    def _build_report_data(self, scan_result: ScanResult, include_findings: bool = True) -> Dict[str, Any]:
+        """Build comprehensive report data structure.
+        
+        With ``include_findings=False`` the findings entry is left as None so the
+        caller can encode findings incrementally.
+        """
+        risk_summary = self._get_risk_summary(scan_result)
         
         return {
             "report_metadata": {
                 "report_type": "Security Posture Assessment",
-                "generated_at": datetime.utcnow().isoformat(),
+                "generated_at": datetime.utcnow(),
                 "scanner_version": "1.0.0",
                 "subscription_id": scan_result.subscription_id,
                 "subscription_name": scan_result.subscription_name,
@@ -99,45 +217,59 @@ class JSONReporter:
             },
             "risk_analysis": risk_summary,
             "findings": [
-                {
-                    "id": finding.id,
-                    "resource": {
-                        "id": finding.resource_id,
-                        "name": finding.resource_name,
-                        "type": finding.resource_type,
-                        "group": finding.resource_group,
-                        "location": finding.location
-                    },
-                    "security_issue": {
-                        "title": finding.title,
-                        "description": finding.description,
-                        "severity": finding.severity,
-                        "risk_score": finding.risk_score,
-                        "recommendation": finding.recommendation
-                    },
-                    "metadata": finding.metadata,
-                    "detected_at": finding.timestamp.isoformat()
-                }
-                for finding in scan_result.findings
-            ],
+                self._format_finding(finding) for finding in scan_result.findings
+            ] if include_findings else None,
             "resource_analysis": self._analyze_resources(scan_result.findings),
-            "recommendations": self._generate_prioritized_recommendations(scan_result.findings),
+            "recommendations": self._generate_prioritized_recommendations(scan_result.get_severity_buckets()),
             "compliance_mapping": self._map_to_compliance_standards(scan_result.findings)
         }
     
+    def _get_risk_summary(self, scan_result: ScanResult) -> Dict[str, Any]:
+        """Return the risk summary of a scan, computed once per scan result."""
+        if scan_result._risk_summary is None:
+            scan_result._risk_summary = risk_engine.generate_risk_summary(scan_result.findings)
+        
+        return scan_result._risk_summary
+    
+    def _format_finding(self, finding: SecurityFinding) -> Dict[str, Any]:
+        """Build the report entry for a single finding."""
+        return {
+            "id": finding.id,
+            "resource": {
+                "id": finding.resource_id,
+                "name": finding.resource_name,
+                "type": finding.resource_type,
+                "group": finding.resource_group,
+                "location": finding.location
+            },
+            "security_issue": {
+                "title": finding.title,
+                "description": finding.description,
+                "severity": finding.severity,
+                "risk_score": finding.risk_score,
+                "recommendation": finding.recommendation
+            },
+            "metadata": finding.metadata,
+            "detected_at": finding.timestamp
+        }
+    
     def _build_summary_data(self, scan_results: List[ScanResult]) -> Dict[str, Any]:
         """Build summary data for multiple scans."""
         if not scan_results:
             return {"error": "No scan results provided"}
         
-        total_findings = sum(len(scan.findings) for scan in scan_results)
-        avg_risk_score = sum(scan.risk_score for scan in scan_results) / len(scan_results)
-        
-        # Aggregate findings by severity across all scans
-        all_severity_counts = {}
+        # Aggregate totals and findings by severity across all scans in one pass
+        total_findings = 0
+        total_resources_scanned = 0
+        risk_score_total = 0
+        all_severity_counts = Counter()
         for scan in scan_results:
-            for severity, count in scan.findings_by_severity.items():
-                all_severity_counts[severity] = all_severity_counts.get(severity, 0) + count
+            total_findings += len(scan.findings)
+            total_resources_scanned += scan.total_resources_scanned
+            risk_score_total += scan.risk_score
+            all_severity_counts.update(scan.findings_by_severity)
+        
+        avg_risk_score = risk_score_total / len(scan_results)
         
         # Calculate trend
         trend_data = risk_engine.calculate_subscription_risk_trend(scan_results)
@@ -145,16 +277,16 @@ class JSONReporter:
         return {
             "summary_metadata": {
                 "report_type": "Multi-Subscription Security Summary",
-                "generated_at": datetime.utcnow().isoformat(),
+                "generated_at": datetime.utcnow(),
                 "scanner_version": "1.0.0",
                 "subscriptions_analyzed": len(scan_results)
             },
             "overall_summary": {
                 "total_subscriptions": len(scan_results),
-                "total_resources_scanned": sum(scan.total_resources_scanned for scan in scan_results),
+                "total_resources_scanned": total_resources_scanned,
                 "total_findings": total_findings,
                 "average_risk_score": round(avg_risk_score, 2),
-                "findings_by_severity": all_severity_counts
+                "findings_by_severity": dict(all_severity_counts)
             },
             "subscription_details": [
                 {
@@ -163,7 +295,7 @@ class JSONReporter:
                     "risk_score": scan.risk_score,
                     "risk_level": risk_engine.get_risk_level(scan.risk_score),
                     "findings_count": len(scan.findings),
-                    "scan_timestamp": scan.scan_timestamp.isoformat()
+                    "scan_timestamp": scan.scan_timestamp
                 }
                 for scan in scan_results
             ],
@@ -174,22 +306,22 @@ class JSONReporter:
     
     def _analyze_resources(self, findings: List[SecurityFinding]) -> Dict[str, Any]:
         """Analyze findings by resource type and location."""
-        from collections import Counter, defaultdict
-        
-        resource_types = Counter(finding.resource_type for finding in findings)
-        locations = Counter(finding.location for finding in findings)
-        resource_groups = Counter(finding.resource_group for finding in findings)
+        resource_types = Counter()
+        locations = Counter()
+        resource_groups = Counter()
+        resource_counts = Counter()
+        first_meta = {}  # resource_id -> (resource_name, resource_type) of its first finding
         
-        # Find most affected resources
-        resource_findings = defaultdict(list)
         for finding in findings:
-            resource_findings[finding.resource_id].append(finding)
+            resource_types[finding.resource_type] += 1
+            locations[finding.location] += 1
+            resource_groups[finding.resource_group] += 1
+            resource_counts[finding.resource_id] += 1
+            if finding.resource_id not in first_meta:
+                first_meta[finding.resource_id] = (finding.resource_name, finding.resource_type)
         
-        most_affected_resources = sorted(
-            [(resource_id, len(findings)) for resource_id, findings in resource_findings.items()],
-            key=lambda x: x[1],
-            reverse=True
-        )[:10]
+        # Find most affected resources
+        most_affected_resources = resource_counts.most_common(10)
         
         return {
             "resource_types": dict(resource_types),
@@ -199,19 +331,28 @@ class JSONReporter:
                 {
                     "resource_id": resource_id,
                     "finding_count": count,
-                    "resource_name": resource_findings[resource_id][0].resource_name,
-                    "resource_type": resource_findings[resource_id][0].resource_type
+                    "resource_name": first_meta[resource_id][0],
+                    "resource_type": first_meta[resource_id][1]
                 }
                 for resource_id, count in most_affected_resources
             ]
         }
     
-    def _generate_prioritized_recommendations(self, findings: List[SecurityFinding]) -> List[Dict[str, Any]]:
+    def _generate_prioritized_recommendations(
+        self, severity_buckets: Dict[SeverityLevel, List[SecurityFinding]]
+    ) -> List[Dict[str, Any]]:
         """Generate prioritized remediation recommendations."""
-        prioritized_findings = risk_engine.prioritize_findings(findings)
+        # Same order as risk_engine.prioritize_findings, but only the buckets
+        # needed for the top 20 are ranked
+        prioritized_findings = []
+        for bucket in severity_buckets.values():
+            remaining = 20 - len(prioritized_findings)  # Top 20 recommendations
+            if remaining <= 0:
+                break
+            prioritized_findings.extend(heapq.nsmallest(remaining, bucket, key=lambda f: -f.risk_score))
         
         recommendations = []
-        for finding in prioritized_findings[:20]:  # Top 20 recommendations
+        for finding in prioritized_findings:
             recommendations.append({
                 "priority": "P1" if finding.severity in ["critical", "high"] else "P2",
                 "finding_id": finding.id,
@@ -227,36 +368,19 @@ class JSONReporter:
     def _map_to_compliance_standards(self, findings: List[SecurityFinding]) -> Dict[str, List[str]]:
         """Map findings to compliance standards."""
         compliance_mapping = {
-            "CIS Controls": [],
-            "NIST Cybersecurity Framework": [],
-            "ISO 27001": [],
-            "SOC 2": []
+            "CIS Controls": set(),
+            "NIST Cybersecurity Framework": set(),
+            "ISO 27001": set(),
+            "SOC 2": set()
         }
         
         for finding in findings:
-            if "public" in finding.title.lower() and "access" in finding.title.lower():
-                compliance_mapping["CIS Controls"].append(f"CIS Control 12 - Network Infrastructure Management")
-                compliance_mapping["NIST Cybersecurity Framework"].append("PR.AC - Access Control")
-                compliance_mapping["ISO 27001"].append("A.9 - Access Control")
-                compliance_mapping["SOC 2"].append("CC6.1 - Logical Access Controls")
-            
-            if "encryption" in finding.title.lower():
-                compliance_mapping["CIS Controls"].append("CIS Control 14 - Controlled Access Based on the Need to Know")
-                compliance_mapping["NIST Cybersecurity Framework"].append("PR.DS - Data Security")
-                compliance_mapping["ISO 27001"].append("A.8 - Asset Management")
-                compliance_mapping["SOC 2"].append("CC6.1 - Logical Access Controls")
-            
-            if "network" in finding.title.lower() or "firewall" in finding.title.lower():
-                compliance_mapping["CIS Controls"].append("CIS Control 12 - Network Infrastructure Management")
-                compliance_mapping["NIST Cybersecurity Framework"].append("PR.AC - Access Control")
-                compliance_mapping["ISO 27001"].append("A.13 - Communications Security")
-                compliance_mapping["SOC 2"].append("CC6.1 - Logical Access Controls")
-        
-        # Remove duplicates
-        for standard in compliance_mapping:
-            compliance_mapping[standard] = list(set(compliance_mapping[standard]))
+            for pattern, controls in _COMPLIANCE_RULES:
+                if pattern.search(finding.title):
+                    for standard, control in controls.items():
+                        compliance_mapping[standard].add(control)
         
-        return compliance_mapping
+        return {standard: list(controls) for standard, controls in compliance_mapping.items()}
     
     def _format_for_compliance(self, findings: List[SecurityFinding]) -> List[Dict[str, Any]]:
         """Format findings for compliance reporting."""
@@ -276,62 +400,48 @@ class JSONReporter:
     
     def _estimate_remediation_effort(self, finding: SecurityFinding) -> str:
         """Estimate remediation effort based on finding type."""
-        low_effort_keywords = ["enable", "disable", "configure", "set"]
-        medium_effort_keywords = ["implement", "deploy", "create"]
-        high_effort_keywords = ["redesign", "migrate", "restructure"]
-        
-        title_lower = finding.title.lower()
-        
-        if any(keyword in title_lower for keyword in low_effort_keywords):
-            return "Low (1-2 hours)"
-        elif any(keyword in title_lower for keyword in medium_effort_keywords):
-            return "Medium (4-8 hours)"
-        elif any(keyword in title_lower for keyword in high_effort_keywords):
-            return "High (1-3 days)"
-        else:
-            return "Medium (4-8 hours)"
+        return _effort_for_title(finding.title)
     
     def _get_top_vulnerabilities(self, scan_results: List[ScanResult]) -> List[Dict[str, Any]]:
         """Get most common vulnerabilities across all scans."""
-        from collections import Counter
-        
-        all_findings = []
+        vulnerability_counts = Counter()
+        title_severities = {}
         for scan in scan_results:
-            all_findings.extend(scan.findings)
-        
-        vulnerability_counts = Counter(finding.title for finding in all_findings)
+            for finding in scan.findings:
+                vulnerability_counts[finding.title] += 1
+                title_severities.setdefault(finding.title, finding.severity)
         
         return [
             {
                 "vulnerability": title,
                 "occurrences": count,
-                "severity": next(
-                    (f.severity for f in all_findings if f.title == title),
-                    "unknown"
-                )
+                "severity": title_severities[title]
             }
             for title, count in vulnerability_counts.most_common(10)
         ]
     
     def _analyze_resource_types(self, scan_results: List[ScanResult]) -> Dict[str, Any]:
         """Analyze findings by resource type across all scans."""
-        from collections import defaultdict, Counter
+        finding_counts = Counter()
+        risk_score_totals = Counter()
+        severity_counts = defaultdict(Counter)
+        title_counts = defaultdict(Counter)
         
-        resource_type_findings = defaultdict(list)
         for scan in scan_results:
             for finding in scan.findings:
-                resource_type_findings[finding.resource_type].append(finding)
+                resource_type = finding.resource_type
+                finding_counts[resource_type] += 1
+                risk_score_totals[resource_type] += finding.risk_score
+                severity_counts[resource_type][finding.severity] += 1
+                title_counts[resource_type][finding.title] += 1
         
         analysis = {}
-        for resource_type, findings in resource_type_findings.items():
-            severity_counts = Counter(finding.severity for finding in findings)
-            avg_risk_score = sum(finding.risk_score for finding in findings) / len(findings)
-            
+        for resource_type, count in finding_counts.items():
             analysis[resource_type] = {
-                "total_findings": len(findings),
-                "severity_breakdown": dict(severity_counts),
-                "average_risk_score": round(avg_risk_score, 2),
-                "most_common_issue": Counter(finding.title for finding in findings).most_common(1)[0]
+                "total_findings": count,
+                "severity_breakdown": dict(severity_counts[resource_type]),
+                "average_risk_score": round(risk_score_totals[resource_type] / count, 2),
+                "most_common_issue": title_counts[resource_type].most_common(1)[0]
             }
         
         return analysis
@@ -1,12 +1,20 @@
 """Main report generator that coordinates all report formats."""
 
+import logging
 import os
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
-from ..models import ScanResult, SecurityFinding
-from .json_reporter import JSONReporter
-from .html_reporter import HTMLReporter
+from ..models import ScanResult, SecurityFinding, SeverityLevel
+from .json_reporter import JSONReporter, _dump_compact_json
+from .html_reporter import HTMLReporter, is_current_report_asset, is_report_asset, report_asset_references
+
+logger = logging.getLogger(__name__)
+
+# JSON, HTML and summary reports of a batch are written concurrently
+_report_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="cspm-report")
 
 
 class ReportGenerator:
@@ -22,21 +30,20 @@ class ReportGenerator:
         """Generate all supported report formats."""
         generated_files = {}
         
-        try:
-            # Generate JSON report
-            json_file = self.json_reporter.generate_report(scan_result)
-            generated_files['json'] = json_file
-            
-            # Generate HTML report
-            html_file = self.html_reporter.generate_report(scan_result)
-            generated_files['html'] = html_file
-            
-            # Generate summary JSON for quick overview
-            summary_file = self._generate_quick_summary(scan_result)
-            generated_files['summary'] = summary_file
-            
-        except Exception as e:
-            print(f"Error generating reports: {str(e)}")
+        # One timestamp so every file of the batch carries the same name suffix
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        futures = {
+            'json': _report_executor.submit(self.json_reporter.generate_report, scan_result, timestamp=timestamp),
+            'html': _report_executor.submit(self.html_reporter.generate_report, scan_result, timestamp=timestamp),
+            # Summary JSON for quick overview
+            'summary': _report_executor.submit(self._generate_quick_summary, scan_result, timestamp=timestamp)
+        }
+        
+        for report_format, future in futures.items():
+            try:
+                generated_files[report_format] = future.result()
+            except Exception:
+                logger.exception("Error generating %s report", report_format)
         
         return generated_files
     
@@ -44,10 +51,23 @@ class ReportGenerator:
         """Generate only JSON report."""
         return self.json_reporter.generate_report(scan_result)
     
+    def render_json_report(self, scan_result: ScanResult) -> bytes:
+        """Render the JSON report in memory without writing it to disk."""
+        return self.json_reporter.render_report(scan_result)
+    
     def generate_html_report(self, scan_result: ScanResult) -> str:
         """Generate only HTML report."""
         return self.html_reporter.generate_report(scan_result)
     
+    def render_html_report(self, scan_result: ScanResult) -> bytes:
+        """Render a self-contained HTML report in memory without writing it to disk."""
+        return self.html_reporter.render_report(scan_result)
+    
+    def load_html_report(self, filepath: str) -> bytes:
+        """Read a saved HTML report with its shared assets inlined."""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return self.html_reporter.inline_assets(f.read()).encode('utf-8')
+    
     def generate_multi_subscription_report(self, scan_results: List[ScanResult]) -> str:
         """Generate a consolidated report for multiple subscriptions."""
         return self.json_reporter.generate_summary_report(scan_results)
@@ -56,11 +76,11 @@ class ReportGenerator:
         """Export findings in specified format."""
         return self.json_reporter.export_findings(findings, format_type)
     
-    def _generate_quick_summary(self, scan_result: ScanResult) -> str:
+    def _generate_quick_summary(self, scan_result: ScanResult, *, timestamp: Optional[str] = None) -> str:
         """Generate a quick summary JSON file."""
         summary_data = {
             "subscription_id": scan_result.subscription_id,
-            "scan_timestamp": scan_result.scan_timestamp.isoformat(),
+            "scan_timestamp": scan_result.scan_timestamp,
             "overall_risk_score": scan_result.risk_score,
             "total_findings": scan_result.total_findings,
             "findings_by_severity": scan_result.findings_by_severity,
@@ -70,41 +90,52 @@ class ReportGenerator:
                     "resource_name": finding.resource_name,
                     "risk_score": finding.risk_score
                 }
-                for finding in scan_result.findings
-                if finding.severity == "critical"
+                for finding in scan_result.get_severity_buckets()[SeverityLevel.CRITICAL]
             ]
         }
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"quick_summary_{scan_result.subscription_id}_{timestamp}.json"
         filepath = os.path.join(self.output_dir, filename)
         
-        import json
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(_dump_compact_json(summary_data))
         
         return filepath
     
     def list_reports(self) -> List[Dict[str, Any]]:
         """List all generated reports."""
+        reports, _, _ = self._scan_reports()
+        return reports
+    
+    def _scan_reports(self) -> Tuple[List[Dict[str, Any]], int, Dict[str, int]]:
+        """List reports newest first, with their total size and count per type, in one directory pass."""
         reports = []
+        total_size = 0
+        report_types: Dict[str, int] = {}
         
         if not os.path.exists(self.output_dir):
-            return reports
-        
-        for filename in os.listdir(self.output_dir):
-            filepath = os.path.join(self.output_dir, filename)
-            if os.path.isfile(filepath):
-                stat = os.stat(filepath)
+            return reports, total_size, report_types
+        
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if not entry.is_file() or is_report_asset(entry.name):
+                    continue
+                
+                stat = entry.stat()
+                report_type = self._get_report_type(entry.name)
                 reports.append({
-                    "filename": filename,
-                    "filepath": filepath,
+                    "filename": entry.name,
+                    "filepath": entry.path,
                     "size": stat.st_size,
                     "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                    "type": self._get_report_type(filename)
+                    "type": report_type
                 })
+                total_size += stat.st_size
+                report_types[report_type] = report_types.get(report_type, 0) + 1
         
-        return sorted(reports, key=lambda x: x['created'], reverse=True)
+        reports.sort(key=lambda x: x['created'], reverse=True)
+        return reports, total_size, report_types
     
     def _get_report_type(self, filename: str) -> str:
         """Determine report type from filename."""
@@ -122,31 +153,60 @@ class ReportGenerator:
     
     def cleanup_old_reports(self, days_to_keep: int = 30) -> int:
         """Clean up reports older than specified days."""
-        import time
-        
         if not os.path.exists(self.output_dir):
             return 0
         
         current_time = time.time()
         cutoff_time = current_time - (days_to_keep * 24 * 60 * 60)
         deleted_count = 0
-        
-        for filename in os.listdir(self.output_dir):
-            filepath = os.path.join(self.output_dir, filename)
-            if os.path.isfile(filepath):
-                file_time = os.path.getmtime(filepath)
-                if file_time < cutoff_time:
+        outdated_assets = []
+        kept_html_reports = []
+        
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                # Assets are shared by reports of any age, so they go only once unreferenced
+                if is_report_asset(entry.name):
+                    if not is_current_report_asset(entry.name):
+                        outdated_assets.append(entry)
+                    continue
+                if entry.stat().st_mtime < cutoff_time:
                     try:
-                        os.remove(filepath)
+                        os.remove(entry.path)
                         deleted_count += 1
                     except Exception as e:
-                        print(f"Error deleting {filename}: {str(e)}")
+                        logger.warning("Error deleting %s: %s", entry.name, e)
+                elif entry.name.endswith('.html'):
+                    kept_html_reports.append(entry.path)
+        
+        if outdated_assets:
+            self._remove_unreferenced_assets(outdated_assets, kept_html_reports)
         
         return deleted_count
     
+    def _remove_unreferenced_assets(self, assets: List[os.DirEntry], html_reports: List[str]) -> None:
+        """Delete outdated asset versions that no remaining HTML report links."""
+        referenced = set()
+        for path in html_reports:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    referenced.update(report_asset_references(f.read()))
+            except OSError as e:
+                # Keep every asset rather than break a report we could not read
+                logger.warning("Error reading %s: %s", path, e)
+                return
+        
+        for entry in assets:
+            if entry.name not in referenced:
+                try:
+                    os.remove(entry.path)
+                except Exception as e:
+                    logger.warning("Error deleting %s: %s", entry.name, e)
+    
     def get_report_statistics(self) -> Dict[str, Any]:
         """Get statistics about generated reports."""
-        reports = self.list_reports()
+        reports, total_size, report_types = self._scan_reports()
         
         if not reports:
             return {
@@ -156,13 +216,6 @@ class ReportGenerator:
                 "latest_report": None
             }
         
-        total_size = sum(report['size'] for report in reports)
-        report_types = {}
-        
-        for report in reports:
-            report_type = report['type']
-            report_types[report_type] = report_types.get(report_type, 0) + 1
-        
         return {
             "total_reports": len(reports),
             "total_size": total_size,
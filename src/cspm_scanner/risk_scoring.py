@@ -1,14 +1,53 @@
 """Risk scoring system for security findings."""
 
-from typing import List, Dict
+import heapq
+from functools import lru_cache
+from typing import List, Dict, Optional
 from collections import Counter
 
 from .models import SecurityFinding, ScanResult, SeverityLevel
 
 
+@lru_cache(maxsize=128)
+def _risk_level_for_score(risk_score: int) -> str:
+    """Map a risk score to its level description."""
+    if risk_score >= 80:
+        return "Critical"
+    elif risk_score >= 60:
+        return "High"
+    elif risk_score >= 40:
+        return "Medium"
+    elif risk_score >= 20:
+        return "Low"
+    else:
+        return "Minimal"
+
+
+# (resource type, finding count it must exceed, recommendation)
+_RESOURCE_RECOMMENDATIONS = (
+    (
+        "Microsoft.Storage/storageAccounts", 3,
+        "Review storage account configurations as multiple security issues were detected."
+    ),
+    (
+        "Microsoft.Network/networkSecurityGroups", 2,
+        "Audit network security group rules to ensure proper network segmentation."
+    ),
+    (
+        "Microsoft.KeyVault/vaults", 1,
+        "Strengthen Key Vault security configurations including firewall rules and access policies."
+    )
+)
+
+# Trend direction indexed by the sign of the score change plus one
+_TREND_DIRECTIONS = ("improving", "stable", "degrading")
+
+
 class RiskScoringEngine:
     """Engine for calculating risk scores and aggregating findings."""
     
+    __slots__ = ("severity_weights",)
+    
     def __init__(self):
         self.severity_weights = {
             SeverityLevel.CRITICAL: 100,
@@ -18,8 +57,12 @@ class RiskScoringEngine:
             SeverityLevel.INFO: 10
         }
     
-    def calculate_overall_risk_score(self, findings: List[SecurityFinding]) -> int:
-        """Calculate overall risk score for a set of findings."""
+    def calculate_overall_risk_score(
+        self,
+        findings: List[SecurityFinding],
+        severity_counts: Optional[Dict[SeverityLevel, int]] = None
+    ) -> int:
+        """Calculate overall risk score for a set of findings, optionally from pre-computed severity counts."""
         if not findings:
             return 0
         
@@ -27,9 +70,12 @@ class RiskScoringEngine:
         total_weight = 0
         weighted_sum = 0
         
-        severity_counts = Counter(finding.severity for finding in findings)
+        if severity_counts is None:
+            severity_counts = Counter(finding.severity for finding in findings)
         
         for severity, count in severity_counts.items():
+            if not count:
+                continue
             weight = self.severity_weights[severity]
             weighted_sum += weight * count
             total_weight += weight
@@ -87,13 +133,12 @@ class RiskScoringEngine:
             trend = 0.0
             direction = "stable"
         else:
-            change_percent = ((current_score - previous_score) / previous_score) * 100
-            trend = round(change_percent, 2)
+            score_change = current_score - previous_score
+            trend = round((score_change / previous_score) * 100, 2)
             
-            if trend > 5:
-                direction = "improving" if current_score < previous_score else "degrading"
-            elif trend < -5:
-                direction = "degrading" if current_score > previous_score else "improving"
+            # A rising risk score is degrading; changes within 5% count as stable
+            if abs(trend) > 5:
+                direction = _TREND_DIRECTIONS[(score_change > 0) - (score_change < 0) + 1]
             else:
                 direction = "stable"
         
@@ -106,33 +151,20 @@ class RiskScoringEngine:
     
     def get_risk_level(self, risk_score: int) -> str:
         """Get risk level description based on score."""
-        if risk_score >= 80:
-            return "Critical"
-        elif risk_score >= 60:
-            return "High"
-        elif risk_score >= 40:
-            return "Medium"
-        elif risk_score >= 20:
-            return "Low"
-        else:
-            return "Minimal"
+        return _risk_level_for_score(int(risk_score))
     
     def prioritize_findings(self, findings: List[SecurityFinding]) -> List[SecurityFinding]:
         """Prioritize findings based on risk score and severity."""
         # Sort by severity (critical first) then by risk score (highest first)
-        severity_order = {
-            SeverityLevel.CRITICAL: 0,
-            SeverityLevel.HIGH: 1,
-            SeverityLevel.MEDIUM: 2,
-            SeverityLevel.LOW: 3,
-            SeverityLevel.INFO: 4
-        }
-        
         return sorted(
             findings,
-            key=lambda f: (severity_order[f.severity], -f.risk_score)
+            key=lambda f: (-f.severity.weight, -f.risk_score)
         )
     
+    def top_k_findings(self, findings: List[SecurityFinding], k: int = 5) -> List[SecurityFinding]:
+        """Return the first k findings in prioritize_findings order without sorting them all."""
+        return heapq.nsmallest(k, findings, key=lambda f: (-f.severity.weight, -f.risk_score))
+    
     def generate_risk_summary(self, findings: List[SecurityFinding]) -> Dict:
         """Generate a comprehensive risk summary."""
         if not findings:
@@ -145,15 +177,29 @@ class RiskScoringEngine:
                 "recommendations": []
             }
         
-        overall_score = self.calculate_overall_risk_score(findings)
-        severity_counts = self.get_findings_by_severity(findings)
-        prioritized_findings = self.prioritize_findings(findings)
+        # Count severities and resource types and track the top 5 risks in one pass.
+        # Heap entries rank like prioritize_findings, earlier findings winning ties.
+        severity_counts = {severity: 0 for severity in SeverityLevel}
+        resource_types = Counter()
+        top_heap = []
+        
+        for position, finding in enumerate(findings):
+            severity_counts[finding.severity] += 1
+            resource_types[finding.resource_type] += 1
+            
+            entry = (finding.severity.weight, finding.risk_score, -position, finding)
+            if len(top_heap) < 5:
+                heapq.heappush(top_heap, entry)
+            else:
+                heapq.heappushpop(top_heap, entry)
+        
+        overall_score = self.calculate_overall_risk_score(findings, severity_counts)
         
         # Get top 5 risks
-        top_risks = prioritized_findings[:5]
+        top_risks = [entry[-1] for entry in sorted(top_heap, reverse=True)]
         
         # Generate recommendations based on findings
-        recommendations = self._generate_recommendations(findings)
+        recommendations = self.recommendations_from_counts(severity_counts, resource_types, len(findings))
         
         return {
             "overall_risk_score": overall_score,
@@ -173,10 +219,14 @@ class RiskScoringEngine:
             "recommendations": recommendations
         }
     
-    def _generate_recommendations(self, findings: List[SecurityFinding]) -> List[str]:
-        """Generate high-level recommendations based on findings."""
+    def recommendations_from_counts(
+        self,
+        severity_counts: Dict[SeverityLevel, int],
+        resource_types: Dict[str, int],
+        total_findings: int
+    ) -> List[str]:
+        """Generate high-level recommendations from pre-computed finding counts."""
         recommendations = []
-        severity_counts = self.get_findings_by_severity(findings)
         
         if severity_counts[SeverityLevel.CRITICAL] > 0:
             recommendations.append(
@@ -189,25 +239,12 @@ class RiskScoringEngine:
             )
         
         # Resource-specific recommendations
-        resource_types = Counter(finding.resource_type for finding in findings)
-        
-        if resource_types.get("Microsoft.Storage/storageAccounts", 0) > 3:
-            recommendations.append(
-                "Review storage account configurations as multiple security issues were detected."
-            )
-        
-        if resource_types.get("Microsoft.Network/networkSecurityGroups", 0) > 2:
-            recommendations.append(
-                "Audit network security group rules to ensure proper network segmentation."
-            )
-        
-        if resource_types.get("Microsoft.KeyVault/vaults", 0) > 1:
-            recommendations.append(
-                "Strengthen Key Vault security configurations including firewall rules and access policies."
-            )
+        for resource_type, threshold, recommendation in _RESOURCE_RECOMMENDATIONS:
+            if resource_types.get(resource_type, 0) > threshold:
+                recommendations.append(recommendation)
         
         # General recommendations
-        if len(findings) > 20:
+        if total_findings > 20:
             recommendations.append(
                 "Consider implementing automated security monitoring and regular security assessments."
             )
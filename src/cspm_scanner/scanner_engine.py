@@ -1,70 +1,75 @@
 """Main scanning engine that coordinates all scanners."""
 
 import asyncio
+import logging
 import time
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 
 from .models import ScanResult, ScanRequest, SecurityFinding, ResourceType, SeverityLevel
-from .scanners import (
-    StorageScanner,
-    NetworkScanner,
-    KeyVaultScanner,
-    ComputeScanner,
-    DatabricksScanner
-)
+from . import scanners
 from .risk_scoring import risk_engine
 from .auth import auth_manager
+from .config import settings
+
+logger = logging.getLogger(__name__)
 
 
 class ScannerEngine:
     """Main scanning engine that orchestrates all security scanners."""
     
     def __init__(self):
+        # Scanner class names, resolved when a scan first needs them
         self.scanners = {
-            ResourceType.STORAGE_ACCOUNT: StorageScanner,
-            ResourceType.NETWORK_SECURITY_GROUP: NetworkScanner,
-            ResourceType.KEY_VAULT: KeyVaultScanner,
-            ResourceType.VIRTUAL_MACHINE: ComputeScanner,
-            ResourceType.DATABRICKS_WORKSPACE: DatabricksScanner,
+            ResourceType.STORAGE_ACCOUNT: "StorageScanner",
+            ResourceType.NETWORK_SECURITY_GROUP: "NetworkScanner",
+            ResourceType.KEY_VAULT: "KeyVaultScanner",
+            ResourceType.VIRTUAL_MACHINE: "ComputeScanner",
+            ResourceType.DATABRICKS_WORKSPACE: "DatabricksScanner",
         }
     
     async def scan_subscription(
         self, 
         subscription_id: str, 
-        scan_request: Optional[ScanRequest] = None
+        scan_request: Optional[ScanRequest] = None,
+        subscription_details: Optional[Dict[str, Any]] = None
     ) -> ScanResult:
-        """Perform a comprehensive security scan of a subscription."""
+        """Perform a comprehensive security scan of a subscription.
+        
+        Bulk callers can pass ``subscription_details`` they already hold to skip the lookup.
+        """
         start_time = time.time()
         
         try:
             # Validate access to subscription
-            if not auth_manager.validate_access(subscription_id):
+            if not await auth_manager.validate_access_async(subscription_id):
                 raise Exception(f"No access to subscription {subscription_id}")
             
             # Get subscription details
-            subscription_details = self._get_subscription_details(subscription_id)
+            if subscription_details is None:
+                subscription_details = await auth_manager.run_sync(
+                    self._get_subscription_details, subscription_id
+                )
             
             # Determine which scanners to run
             scanners_to_run = self._get_scanners_to_run(scan_request)
             
             # Run scanners concurrently
+            scanner_results = await asyncio.gather(*(
+                self._run_scanner(resource_type, scanner_name, subscription_id)
+                for resource_type, scanner_name in scanners_to_run.items()
+            ))
+            
             all_findings = []
-            total_resources_scanned = 0
+            unique_resources = set()
+            
+            for findings in scanner_results:
+                all_findings.extend(findings)
+                
+                # Count resources (simplified - in practice would track actual resource count)
+                unique_resources.update(finding.resource_id for finding in findings)
             
-            for resource_type, scanner_class in scanners_to_run.items():
-                try:
-                    scanner = scanner_class(subscription_id)
-                    findings = await scanner.scan()
-                    all_findings.extend(findings)
-                    
-                    # Count resources (simplified - in practice would track actual resource count)
-                    resource_ids = set(finding.resource_id for finding in findings)
-                    total_resources_scanned += len(resource_ids)
-                    
-                except Exception as e:
-                    print(f"Error running {resource_type} scanner: {str(e)}")
-                    continue
+            total_resources_scanned = len(unique_resources)
             
             # Filter findings by severity threshold
             if scan_request and scan_request.severity_threshold:
@@ -74,8 +79,8 @@ class ScannerEngine:
                 )
             
             # Calculate risk scores and statistics
-            overall_risk_score = risk_engine.calculate_overall_risk_score(all_findings)
             findings_by_severity = risk_engine.get_findings_by_severity(all_findings)
+            overall_risk_score = risk_engine.calculate_overall_risk_score(all_findings, findings_by_severity)
             
             # Create scan result
             scan_duration = time.time() - start_time
@@ -86,7 +91,7 @@ class ScannerEngine:
                 scan_timestamp=datetime.utcnow(),
                 total_resources_scanned=total_resources_scanned,
                 total_findings=len(all_findings),
-                findings_by_severity=findings_by_severity,
+                severity_counts=tuple(findings_by_severity[severity] for severity in SeverityLevel),
                 findings=all_findings,
                 risk_score=overall_risk_score,
                 scan_duration_seconds=scan_duration
@@ -98,26 +103,50 @@ class ScannerEngine:
             # Return a scan result with error information
             return ScanResult(
                 subscription_id=subscription_id,
-                subscription_name=subscription_details.get('display_name') if 'subscription_details' in locals() else None,
+                subscription_name=subscription_details.get('display_name') if subscription_details else None,
                 scan_timestamp=datetime.utcnow(),
                 total_resources_scanned=0,
                 total_findings=0,
-                findings_by_severity={},
                 findings=[],
                 risk_score=0,
                 scan_duration_seconds=time.time() - start_time
             )
     
+    async def _run_scanner(
+        self,
+        resource_type: ResourceType,
+        scanner_name: str,
+        subscription_id: str
+    ) -> List[SecurityFinding]:
+        """Run one resource scanner, returning no findings if it fails."""
+        try:
+            scanner = getattr(scanners, scanner_name)(subscription_id)
+            return await scanner.scan()
+        except Exception as e:
+            logger.warning("Error running %s scanner: %s", resource_type, e)
+            return []
+    
     async def scan_multiple_subscriptions(
         self, 
         subscription_ids: List[str],
-        scan_request: Optional[ScanRequest] = None
+        scan_request: Optional[ScanRequest] = None,
+        max_concurrency: Optional[int] = None
     ) -> List[ScanResult]:
-        """Scan multiple subscriptions concurrently."""
-        tasks = [
-            self.scan_subscription(sub_id, scan_request) 
-            for sub_id in subscription_ids
-        ]
+        """Scan multiple subscriptions concurrently, at most ``max_concurrency`` at a time."""
+        # Look up every subscription's details once instead of once per scan
+        try:
+            subscriptions = await auth_manager.list_subscriptions_async()
+            details_by_id = {sub['id']: sub for sub in subscriptions}
+        except Exception:
+            details_by_id = {}
+        
+        semaphore = asyncio.Semaphore(max_concurrency or settings.max_concurrent_subscriptions)
+        
+        async def scan_bounded(sub_id: str) -> ScanResult:
+            async with semaphore:
+                return await self.scan_subscription(sub_id, scan_request, details_by_id.get(sub_id, {}))
+        
+        tasks = [scan_bounded(sub_id) for sub_id in subscription_ids]
         
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
@@ -125,7 +154,7 @@ class ScannerEngine:
         scan_results = []
         for result in results:
             if isinstance(result, Exception):
-                print(f"Scan failed: {str(result)}")
+                logger.error("Scan failed: %s", result)
                 continue
             if isinstance(result, ScanResult):
                 scan_results.append(result)
@@ -135,13 +164,13 @@ class ScannerEngine:
     async def scan_all_subscriptions(self, scan_request: Optional[ScanRequest] = None) -> List[ScanResult]:
         """Scan all accessible subscriptions."""
         try:
-            subscriptions = auth_manager.list_subscriptions()
+            subscriptions = await auth_manager.list_subscriptions_async()
             subscription_ids = [sub['id'] for sub in subscriptions]
             
             return await self.scan_multiple_subscriptions(subscription_ids, scan_request)
             
         except Exception as e:
-            print(f"Error scanning all subscriptions: {str(e)}")
+            logger.exception("Error scanning all subscriptions: %s", e)
             return []
     
     def _get_subscription_details(self, subscription_id: str) -> Dict[str, Any]:
@@ -156,13 +185,18 @@ class ScannerEngine:
         
         return {}
     
-    def _get_scanners_to_run(self, scan_request: Optional[ScanRequest]) -> Dict[ResourceType, Any]:
-        """Determine which scanners to run based on request."""
+    def _get_scanners_to_run(self, scan_request: Optional[ScanRequest]) -> Dict[ResourceType, str]:
+        """Determine which scanners to run based on request.
+        
+        Without a resource type filter this is the shared ``self.scanners`` dict,
+        which callers must not mutate.
+        """
         if scan_request and scan_request.resource_types:
+            requested = frozenset(scan_request.resource_types)
             return {
-                resource_type: self.scanners[resource_type]
-                for resource_type in scan_request.resource_types
-                if resource_type in self.scanners
+                resource_type: scanner_name
+                for resource_type, scanner_name in self.scanners.items()
+                if resource_type in requested
             }
         
         # Run all scanners by default
@@ -174,19 +208,11 @@ class ScannerEngine:
         min_severity: SeverityLevel
     ) -> List[SecurityFinding]:
         """Filter findings based on minimum severity level."""
-        severity_order = {
-            SeverityLevel.INFO: 0,
-            SeverityLevel.LOW: 1,
-            SeverityLevel.MEDIUM: 2,
-            SeverityLevel.HIGH: 3,
-            SeverityLevel.CRITICAL: 4
-        }
-        
-        min_level = severity_order.get(min_severity, 0)
+        min_level = min_severity.weight
         
         return [
             finding for finding in findings
-            if severity_order.get(finding.severity, 0) >= min_level
+            if finding.severity.weight >= min_level
         ]
     
     def get_supported_resource_types(self) -> List[ResourceType]:
@@ -203,7 +229,7 @@ class ScannerEngine:
         
         # Validate subscription access
         if scan_request.subscription_id:
-            if not auth_manager.validate_access(scan_request.subscription_id):
+            if not await auth_manager.validate_access_async(scan_request.subscription_id):
                 validation_result["valid"] = False
                 validation_result["errors"].append(
                     f"No access to subscription {scan_request.subscription_id}"
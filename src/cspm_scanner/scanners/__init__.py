@@ -1,11 +1,17 @@
 """Security scanning modules for different Azure resource types."""
 
+import importlib
+
 from .base_scanner import BaseScanner
-from .storage_scanner import StorageScanner
-from .network_scanner import NetworkScanner
-from .keyvault_scanner import KeyVaultScanner
-from .compute_scanner import ComputeScanner
-from .databricks_scanner import DatabricksScanner
+
+# Scanner modules and the management SDKs they use are only imported once a scan needs them
+_LAZY_SCANNERS = {
+    "StorageScanner": ".storage_scanner",
+    "NetworkScanner": ".network_scanner",
+    "KeyVaultScanner": ".keyvault_scanner",
+    "ComputeScanner": ".compute_scanner",
+    "DatabricksScanner": ".databricks_scanner",
+}
 
 __all__ = [
     "BaseScanner",
@@ -15,3 +21,13 @@ __all__ = [
     "ComputeScanner",
     "DatabricksScanner",
 ]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_SCANNERS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    scanner_class = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = scanner_class  # Later lookups skip __getattr__
+    return scanner_class
@@ -1,25 +1,107 @@
 """Base scanner class for all Azure resource scanners."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
 from datetime import datetime
-import uuid
+import asyncio
+import os
 
 from ..models import SecurityFinding, ResourceType, SeverityLevel
 
 
+# Finding ids generated per os.urandom call
+_FINDING_ID_BATCH = 256
+
+_SEVERITY_MULTIPLIERS = {
+    SeverityLevel.CRITICAL: 1.0,
+    SeverityLevel.HIGH: 0.8,
+    SeverityLevel.MEDIUM: 0.6,
+    SeverityLevel.LOW: 0.4,
+    SeverityLevel.INFO: 0.2
+}
+
+
+def _next_page(pages: Iterator) -> Optional[list]:
+    """Fetch the next page of an Azure SDK pager, or None once it is exhausted."""
+    try:
+        return list(next(pages))
+    except StopIteration:
+        return None
+
+
+def _risk_score(severity: SeverityLevel, base_score: int) -> int:
+    """Scale a base score by its severity multiplier, capped at 100."""
+    multiplier = _SEVERITY_MULTIPLIERS.get(severity, 0.5)
+    return min(100, int(base_score * multiplier))
+
+
+class ScanRule:
+    """A resource check and the finding it raises."""
+    
+    __slots__ = (
+        "title", "description", "severity", "base_score", "recommendation",
+        "check", "metadata", "risk_score"
+    )
+    
+    def __init__(
+        self,
+        title: str,
+        description: str,
+        severity: SeverityLevel,
+        base_score: int,
+        recommendation: str,
+        check: Callable[[Any, Any], bool],
+        metadata: Callable[[Any], Dict[str, Any]]
+    ):
+        self.title = title
+        self.description = description
+        self.severity = severity
+        self.base_score = base_score
+        self.recommendation = recommendation
+        # Called as check(scanner, resource); True means the finding applies
+        self.check = check
+        self.metadata = metadata
+        # Rules are built at import, so every finding reuses this score
+        self.risk_score = _risk_score(severity, base_score)
+
+
 class BaseScanner(ABC):
     """Abstract base class for all security scanners."""
     
+    __slots__ = ("subscription_id", "resource_type", "_finding_ids", "_scan_timestamp")
+    
     def __init__(self, subscription_id: str, resource_type: ResourceType):
         self.subscription_id = subscription_id
         self.resource_type = resource_type
+        self._finding_ids = iter(())
+        # Every finding from one scanner run shares the scan start time
+        self._scan_timestamp = datetime.utcnow()
     
     @abstractmethod
     async def scan(self) -> List[SecurityFinding]:
         """Scan resources and return security findings."""
         pass
     
+    async def _iter_pages(self, pager) -> AsyncIterator[list]:
+        """Yield the pages of an Azure SDK pager, fetching each one in a worker thread.
+        
+        The next page is fetched while the caller processes the current one.
+        """
+        loop = asyncio.get_running_loop()
+        pages = pager.by_page()
+        # run_in_executor submits right away, so the fetch starts before the caller resumes
+        pending = loop.run_in_executor(None, _next_page, pages)
+        try:
+            while True:
+                page = await pending
+                if page is None:
+                    return
+                pending = loop.run_in_executor(None, _next_page, pages)
+                yield page
+        finally:
+            # Drop the prefetch if the caller stops early
+            pending.cancel()
+    
     def create_finding(
         self,
         resource_id: str,
@@ -35,7 +117,7 @@ class BaseScanner(ABC):
     ) -> SecurityFinding:
         """Create a security finding with common fields."""
         return SecurityFinding(
-            id=str(uuid.uuid4()),
+            id=self._new_finding_id(),
             resource_id=resource_id,
             resource_name=resource_name,
             resource_type=self.resource_type,
@@ -48,25 +130,60 @@ class BaseScanner(ABC):
             recommendation=recommendation,
             risk_score=risk_score,
             metadata=metadata or {},
-            timestamp=datetime.utcnow()
+            timestamp=self._scan_timestamp
         )
     
+    def _rule_findings(self, resource, rules, details=None) -> Iterator[SecurityFinding]:
+        """Yield a finding for every rule whose check applies to an ARM resource.
+        
+        Rule metadata is built from ``details(resource)``, extracted once when the first
+        rule applies, or from the resource itself when no extractor is given.
+        """
+        # Read the identifying fields once per resource rather than once per finding
+        resource_id = resource.id
+        resource_name = resource.name
+        location = resource.location
+        resource_group = self.get_resource_group(resource_id)
+        facts = None
+        for rule in rules:
+            if rule.check(self, resource):
+                if facts is None:
+                    facts = details(resource) if details else resource
+                yield self.create_finding(
+                    resource_id=resource_id,
+                    resource_name=resource_name,
+                    resource_group=resource_group,
+                    location=location,
+                    title=rule.title,
+                    description=rule.description,
+                    severity=rule.severity,
+                    recommendation=rule.recommendation,
+                    risk_score=rule.risk_score,
+                    metadata=rule.metadata(facts)
+                )
+    
     def calculate_risk_score(self, severity: SeverityLevel, base_score: int = 50) -> int:
         """Calculate risk score based on severity."""
-        severity_multipliers = {
-            SeverityLevel.CRITICAL: 1.0,
-            SeverityLevel.HIGH: 0.8,
-            SeverityLevel.MEDIUM: 0.6,
-            SeverityLevel.LOW: 0.4,
-            SeverityLevel.INFO: 0.2
-        }
-        
-        multiplier = severity_multipliers.get(severity, 0.5)
-        return min(100, int(base_score * multiplier))
+        return _risk_score(severity, base_score)
+    
+    def _new_finding_id(self) -> str:
+        """Return a random 128-bit hex id, reading entropy for a batch of ids at a time."""
+        try:
+            return next(self._finding_ids)
+        except StopIteration:
+            pool = os.urandom(16 * _FINDING_ID_BATCH).hex()
+            self._finding_ids = iter([pool[i:i + 32] for i in range(32, len(pool), 32)])
+            return pool[:32]
+    
+    def get_resource_group(self, resource_id: str) -> str:
+        """Extract the resource group from an Azure resource ID."""
+        # /subscriptions/{id}/resourceGroups/{name}/... - stop splitting after the group
+        return resource_id.split('/', 5)[4]
     
     def get_resource_id_parts(self, resource_id: str) -> Dict[str, str]:
         """Extract parts from Azure resource ID."""
-        parts = resource_id.split('/')
+        # Only the first nine segments are needed; child resource segments stay unsplit
+        parts = resource_id.split('/', 9)
         return {
             'subscription_id': parts[2] if len(parts) > 2 else '',
             'resource_group': parts[4] if len(parts) > 4 else '',
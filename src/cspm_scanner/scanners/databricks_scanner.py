@@ -1,19 +1,30 @@
 """Databricks workspace security scanner."""
 
-from typing import List
-import asyncio
+import logging
+from typing import Iterator, List
 
 from azure.mgmt.databricks import DatabricksClient
 from azure.core.exceptions import HttpResponseError
 
-from .base_scanner import BaseScanner
+from .base_scanner import BaseScanner, ScanRule
 from ..models import SecurityFinding, ResourceType, SeverityLevel
 from ..auth import auth_manager
 
+logger = logging.getLogger(__name__)
+
+# Metadata that does not depend on the workspace, shared by every finding it is attached to.
+# Findings never mutate their metadata.
+_INSECURE_CONNECTIVITY_METADATA = {"secure_connectivity": False}
+_PLATFORM_KEYS_METADATA = {"encryption_key_source": "Platform"}  # Default assumption
+_NO_PRIVATE_ENDPOINTS_METADATA = {"private_endpoints": False}
+_NO_ISOLATION_METADATA = {"network_isolation": False}
+
 
 class DatabricksScanner(BaseScanner):
     """Scanner for Azure Databricks workspaces."""
     
+    __slots__ = ("client",)
+    
     def __init__(self, subscription_id: str):
         super().__init__(subscription_id, ResourceType.DATABRICKS_WORKSPACE)
         self.client = auth_manager.get_databricks_client(subscription_id)
@@ -23,126 +34,28 @@ class DatabricksScanner(BaseScanner):
         findings = []
         
         try:
-            workspaces = list(self.client.workspaces.list())
-            
-            # Process workspaces concurrently
-            tasks = [self._scan_workspace(workspace) for workspace in workspaces]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    continue
-                if isinstance(result, list):
-                    findings.extend(result)
+            async for page in self._iter_pages(self.client.workspaces.list()):
+                for workspace in page:
+                    findings.extend(self._scan_workspace(workspace))
                     
         except Exception as e:
-            print(f"Error scanning Databricks workspaces: {str(e)}")
+            logger.warning("Error scanning Databricks workspaces: %s", e)
         
         return findings
     
-    async def _scan_workspace(self, workspace) -> List[SecurityFinding]:
+    def _scan_workspace(self, workspace) -> Iterator[SecurityFinding]:
         """Scan a single Databricks workspace for security issues."""
-        findings = []
-        
         try:
-            resource_group = workspace.id.split('/')[4]
-            
-            # Check for public network access
-            if self._has_public_network_access(workspace):
-                findings.append(self.create_finding(
-                    resource_id=workspace.id,
-                    resource_name=workspace.name,
-                    resource_group=resource_group,
-                    location=workspace.location,
-                    title="Databricks Workspace Public Access Enabled",
-                    description="Databricks workspace allows public network access",
-                    severity=SeverityLevel.HIGH,
-                    recommendation="Disable public network access and use private endpoints or VNet injection",
-                    risk_score=self.calculate_risk_score(SeverityLevel.HIGH, 80),
-                    metadata={
-                        "public_network_access": workspace.parameters.public_network_access.value if hasattr(workspace.parameters, 'public_network_access') else "Enabled"
-                    }
-                ))
-            
-            # Check for secure cluster connectivity
-            if not self._has_secure_connectivity(workspace):
-                findings.append(self.create_finding(
-                    resource_id=workspace.id,
-                    resource_name=workspace.name,
-                    resource_group=resource_group,
-                    location=workspace.location,
-                    title="Insecure Cluster Connectivity",
-                    description="Databricks workspace does not have secure cluster connectivity enabled",
-                    severity=SeverityLevel.MEDIUM,
-                    recommendation="Enable secure cluster connectivity for enhanced security",
-                    risk_score=self.calculate_risk_score(SeverityLevel.MEDIUM, 50),
-                    metadata={
-                        "secure_connectivity": False
-                    }
-                ))
-            
-            # Check for customer-managed keys
-            if not self._uses_customer_managed_keys(workspace):
-                findings.append(self.create_finding(
-                    resource_id=workspace.id,
-                    resource_name=workspace.name,
-                    resource_group=resource_group,
-                    location=workspace.location,
-                    title="Not Using Customer-Managed Keys",
-                    description="Databricks workspace is using platform-managed keys instead of customer-managed keys",
-                    severity=SeverityLevel.LOW,
-                    recommendation="Consider using customer-managed keys for enhanced data protection",
-                    risk_score=self.calculate_risk_score(SeverityLevel.LOW, 30),
-                    metadata={
-                        "encryption_key_source": "Platform"  # Default assumption
-                    }
-                ))
-            
-            # Check for private endpoint configuration
-            if not self._has_private_endpoints(workspace):
-                findings.append(self.create_finding(
-                    resource_id=workspace.id,
-                    resource_name=workspace.name,
-                    resource_group=resource_group,
-                    location=workspace.location,
-                    title="No Private Endpoints Configured",
-                    description="Databricks workspace does not have private endpoints configured",
-                    severity=SeverityLevel.MEDIUM,
-                    recommendation="Configure private endpoints to eliminate public internet exposure",
-                    risk_score=self.calculate_risk_score(SeverityLevel.MEDIUM, 45),
-                    metadata={
-                        "private_endpoints": False
-                    }
-                ))
-            
-            # Check for workspace isolation
-            if not self._has_workspace_isolation(workspace):
-                findings.append(self.create_finding(
-                    resource_id=workspace.id,
-                    resource_name=workspace.name,
-                    resource_group=resource_group,
-                    location=workspace.location,
-                    title="No Workspace Isolation",
-                    description="Databricks workspace may not have proper network isolation",
-                    severity=SeverityLevel.MEDIUM,
-                    recommendation="Implement workspace isolation using VNet injection for enhanced security",
-                    risk_score=self.calculate_risk_score(SeverityLevel.MEDIUM, 55),
-                    metadata={
-                        "network_isolation": False
-                    }
-                ))
+            yield from self._rule_findings(workspace, self._WORKSPACE_RULES)
             
         except Exception as e:
-            print(f"Error scanning Databricks workspace {workspace.name}: {str(e)}")
-        
-        return findings
+            logger.warning("Error scanning Databricks workspace %s: %s", workspace.name, e)
     
     def _has_public_network_access(self, workspace) -> bool:
         """Check if workspace allows public network access."""
         # Default to True if not explicitly disabled
-        if hasattr(workspace.parameters, 'public_network_access'):
-            return workspace.parameters.public_network_access.value == "Enabled"
-        return True
+        parameters = workspace.parameters
+        return not hasattr(parameters, 'public_network_access') or parameters.public_network_access.value == "Enabled"
     
     def _has_secure_connectivity(self, workspace) -> bool:
         """Check if workspace has secure cluster connectivity."""
@@ -153,10 +66,8 @@ class DatabricksScanner(BaseScanner):
     def _uses_customer_managed_keys(self, workspace) -> bool:
         """Check if workspace uses customer-managed keys."""
         # Check if encryption parameters specify customer-managed keys
-        if hasattr(workspace.parameters, 'encryption'):
-            if workspace.parameters.encryption and hasattr(workspace.parameters.encryption, 'key_source'):
-                return workspace.parameters.encryption.key_source.value == "Microsoft.Keyvault"
-        return False
+        encryption = getattr(workspace.parameters, 'encryption', None)
+        return bool(encryption) and hasattr(encryption, 'key_source') and encryption.key_source.value == "Microsoft.Keyvault"
     
     def _has_private_endpoints(self, workspace) -> bool:
         """Check if workspace has private endpoints configured."""
@@ -167,7 +78,56 @@ class DatabricksScanner(BaseScanner):
     def _has_workspace_isolation(self, workspace) -> bool:
         """Check if workspace has proper network isolation."""
         # Check if workspace is configured with VNet injection
-        if hasattr(workspace.parameters, 'custom_parameters'):
-            if workspace.parameters.custom_parameters and hasattr(workspace.parameters.custom_parameters, 'virtual_network_id'):
-                return workspace.parameters.custom_parameters.virtual_network_id is not None
-        return False
+        custom_parameters = getattr(workspace.parameters, 'custom_parameters', None)
+        return bool(custom_parameters) and getattr(custom_parameters, 'virtual_network_id', None) is not None
+    
+    # Checks run against every workspace, in finding order
+    _WORKSPACE_RULES = (
+        ScanRule(
+            title="Databricks Workspace Public Access Enabled",
+            description="Databricks workspace allows public network access",
+            severity=SeverityLevel.HIGH,
+            base_score=80,
+            recommendation="Disable public network access and use private endpoints or VNet injection",
+            check=_has_public_network_access,
+            metadata=lambda workspace: {
+                "public_network_access": workspace.parameters.public_network_access.value if hasattr(workspace.parameters, 'public_network_access') else "Enabled"
+            }
+        ),
+        ScanRule(
+            title="Insecure Cluster Connectivity",
+            description="Databricks workspace does not have secure cluster connectivity enabled",
+            severity=SeverityLevel.MEDIUM,
+            base_score=50,
+            recommendation="Enable secure cluster connectivity for enhanced security",
+            check=lambda scanner, workspace: not scanner._has_secure_connectivity(workspace),
+            metadata=lambda workspace: _INSECURE_CONNECTIVITY_METADATA
+        ),
+        ScanRule(
+            title="Not Using Customer-Managed Keys",
+            description="Databricks workspace is using platform-managed keys instead of customer-managed keys",
+            severity=SeverityLevel.LOW,
+            base_score=30,
+            recommendation="Consider using customer-managed keys for enhanced data protection",
+            check=lambda scanner, workspace: not scanner._uses_customer_managed_keys(workspace),
+            metadata=lambda workspace: _PLATFORM_KEYS_METADATA
+        ),
+        ScanRule(
+            title="No Private Endpoints Configured",
+            description="Databricks workspace does not have private endpoints configured",
+            severity=SeverityLevel.MEDIUM,
+            base_score=45,
+            recommendation="Configure private endpoints to eliminate public internet exposure",
+            check=lambda scanner, workspace: not scanner._has_private_endpoints(workspace),
+            metadata=lambda workspace: _NO_PRIVATE_ENDPOINTS_METADATA
+        ),
+        ScanRule(
+            title="No Workspace Isolation",
+            description="Databricks workspace may not have proper network isolation",
+            severity=SeverityLevel.MEDIUM,
+            base_score=55,
+            recommendation="Implement workspace isolation using VNet injection for enhanced security",
+            check=lambda scanner, workspace: not scanner._has_workspace_isolation(workspace),
+            metadata=lambda workspace: _NO_ISOLATION_METADATA
+        )
+    )
@@ -1,19 +1,38 @@
 """Key Vault security scanner."""
 
-from typing import List
-import asyncio
+import logging
+from typing import Any, Dict, Iterator, List
 
 from azure.mgmt.keyvault import KeyVaultManagementClient
 from azure.core.exceptions import HttpResponseError
 
-from .base_scanner import BaseScanner
+from .base_scanner import BaseScanner, ScanRule
 from ..models import SecurityFinding, ResourceType, SeverityLevel
 from ..auth import auth_manager
 
+logger = logging.getLogger(__name__)
+
+
+def _bypass_services(vault) -> List[str]:
+    """Return the services allowed to bypass a key vault's network rules."""
+    return [service.value for service in vault.properties.network_acls.bypass]
+
+
+def _network_acls_metadata(network_acls) -> Dict[str, Any]:
+    """Build the public access metadata from one network_acls lookup."""
+    if not network_acls:
+        return {"public_network_access": "Allow", "bypass": None}
+    return {
+        "public_network_access": network_acls.default_action.value,
+        "bypass": network_acls.bypass
+    }
+
 
 class KeyVaultScanner(BaseScanner):
     """Scanner for Azure Key Vault resources."""
     
+    __slots__ = ("client",)
+    
     def __init__(self, subscription_id: str):
         super().__init__(subscription_id, ResourceType.KEY_VAULT)
         self.client = auth_manager.get_keyvault_client(subscription_id)
@@ -23,148 +42,100 @@ class KeyVaultScanner(BaseScanner):
         findings = []
         
         try:
-            vaults = list(self.client.vaults.list())
-            
-            # Process vaults concurrently
-            tasks = [self._scan_vault(vault) for vault in vaults]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    continue
-                if isinstance(result, list):
-                    findings.extend(result)
+            async for page in self._iter_pages(self.client.vaults.list()):
+                for vault in page:
+                    findings.extend(self._scan_vault(vault))
                     
         except Exception as e:
-            print(f"Error scanning key vaults: {str(e)}")
+            logger.warning("Error scanning key vaults: %s", e)
         
         return findings
     
-    async def _scan_vault(self, vault) -> List[SecurityFinding]:
+    def _scan_vault(self, vault) -> Iterator[SecurityFinding]:
         """Scan a single key vault for security issues."""
-        findings = []
-        
         try:
-            resource_group = vault.id.split('/')[4]
-            
-            # Check network access (firewall configuration)
-            if self._has_public_network_access(vault):
-                findings.append(self.create_finding(
-                    resource_id=vault.id,
-                    resource_name=vault.name,
-                    resource_group=resource_group,
-                    location=vault.location,
-                    title="Key Vault Allows Public Network Access",
-                    description="Key Vault is accessible from public networks without firewall restrictions",
-                    severity=SeverityLevel.HIGH,
-                    recommendation="Enable Key Vault firewall and restrict access to trusted networks",
-                    risk_score=self.calculate_risk_score(SeverityLevel.HIGH, 75),
-                    metadata={
-                        "public_network_access": vault.properties.network_acls.default_action.value if vault.properties.network_acls else "Allow",
-                        "bypass": vault.properties.network_acls.bypass if vault.properties.network_acls else None
-                    }
-                ))
-            
-            # Check for soft delete protection
-            if not self._has_soft_delete_enabled(vault):
-                findings.append(self.create_finding(
-                    resource_id=vault.id,
-                    resource_name=vault.name,
-                    resource_group=resource_group,
-                    location=vault.location,
-                    title="Soft Delete Not Enabled",
-                    description="Key Vault does not have soft delete protection enabled",
-                    severity=SeverityLevel.MEDIUM,
-                    recommendation="Enable soft delete to protect against accidental deletion of secrets and keys",
-                    risk_score=self.calculate_risk_score(SeverityLevel.MEDIUM, 50),
-                    metadata={
-                        "soft_delete_enabled": vault.properties.enable_soft_delete if hasattr(vault.properties, 'enable_soft_delete') else False
-                    }
-                ))
-            
-            # Check for purge protection
-            if not self._has_purge_protection(vault):
-                findings.append(self.create_finding(
-                    resource_id=vault.id,
-                    resource_name=vault.name,
-                    resource_group=resource_group,
-                    location=vault.location,
-                    title="Purge Protection Not Enabled",
-                    description="Key Vault does not have purge protection enabled",
-                    severity=SeverityLevel.MEDIUM,
-                    recommendation="Enable purge protection to prevent permanent deletion of soft-deleted items",
-                    risk_score=self.calculate_risk_score(SeverityLevel.MEDIUM, 45),
-                    metadata={
-                        "purge_protection_enabled": vault.properties.enable_purge_protection if hasattr(vault.properties, 'enable_purge_protection') else False
-                    }
-                ))
-            
-            # Check for RBAC authorization
-            if not self._uses_rbac_authorization(vault):
-                findings.append(self.create_finding(
-                    resource_id=vault.id,
-                    resource_name=vault.name,
-                    resource_group=resource_group,
-                    location=vault.location,
-                    title="Not Using RBAC Authorization",
-                    description="Key Vault is using access policies instead of Azure RBAC for authorization",
-                    severity=SeverityLevel.LOW,
-                    recommendation="Consider using Azure RBAC for more granular and centralized access control",
-                    risk_score=self.calculate_risk_score(SeverityLevel.LOW, 30),
-                    metadata={
-                        "enable_rbac_authorization": vault.properties.enable_rbac_authorization if hasattr(vault.properties, 'enable_rbac_authorization') else False
-                    }
-                ))
-            
-            # Check for allowed access patterns
-            if vault.properties.network_acls and vault.properties.network_acls.bypass:
-                bypass_services = [service.value for service in vault.properties.network_acls.bypass]
-                if "AzureServices" in bypass_services:
-                    findings.append(self.create_finding(
-                        resource_id=vault.id,
-                        resource_name=vault.name,
-                        resource_group=resource_group,
-                        location=vault.location,
-                        title="Azure Services Bypass Enabled",
-                        description="Key Vault allows Azure services to bypass network rules",
-                        severity=SeverityLevel.LOW,
-                        recommendation="Review if Azure services bypass is necessary for your security requirements",
-                        risk_score=self.calculate_risk_score(SeverityLevel.LOW, 25),
-                        metadata={
-                            "bypass_services": bypass_services
-                        }
-                    ))
+            yield from self._rule_findings(vault, self._VAULT_RULES)
             
         except Exception as e:
-            print(f"Error scanning key vault {vault.name}: {str(e)}")
-        
-        return findings
+            logger.warning("Error scanning key vault %s: %s", vault.name, e)
     
     def _has_public_network_access(self, vault) -> bool:
         """Check if key vault allows public network access."""
-        if not vault.properties.network_acls:
-            return True  # No network ACLs means public access
-        
-        # Check if default action is Allow
-        if vault.properties.network_acls.default_action.value == "Allow":
-            return True
-        
-        return False
+        # No network ACLs means public access, otherwise check if default action is Allow
+        network_acls = vault.properties.network_acls
+        return not network_acls or network_acls.default_action.value == "Allow"
     
     def _has_soft_delete_enabled(self, vault) -> bool:
         """Check if soft delete is enabled."""
-        if hasattr(vault.properties, 'enable_soft_delete'):
-            return vault.properties.enable_soft_delete
-        return False
+        return getattr(vault.properties, 'enable_soft_delete', False)
     
     def _has_purge_protection(self, vault) -> bool:
         """Check if purge protection is enabled."""
-        if hasattr(vault.properties, 'enable_purge_protection'):
-            return vault.properties.enable_purge_protection
-        return False
+        return getattr(vault.properties, 'enable_purge_protection', False)
     
     def _uses_rbac_authorization(self, vault) -> bool:
         """Check if key vault uses RBAC authorization."""
-        if hasattr(vault.properties, 'enable_rbac_authorization'):
-            return vault.properties.enable_rbac_authorization
-        return False
+        return getattr(vault.properties, 'enable_rbac_authorization', False)
+    
+    def _allows_azure_services_bypass(self, vault) -> bool:
+        """Check if Azure services may bypass the key vault network rules."""
+        return bool(vault.properties.network_acls and vault.properties.network_acls.bypass) and (
+            "AzureServices" in _bypass_services(vault)
+        )
+    
+    # Checks run against every key vault, in finding order
+    _VAULT_RULES = (
+        ScanRule(
+            title="Key Vault Allows Public Network Access",
+            description="Key Vault is accessible from public networks without firewall restrictions",
+            severity=SeverityLevel.HIGH,
+            base_score=75,
+            recommendation="Enable Key Vault firewall and restrict access to trusted networks",
+            check=_has_public_network_access,
+            metadata=lambda vault: _network_acls_metadata(vault.properties.network_acls)
+        ),
+        ScanRule(
+            title="Soft Delete Not Enabled",
+            description="Key Vault does not have soft delete protection enabled",
+            severity=SeverityLevel.MEDIUM,
+            base_score=50,
+            recommendation="Enable soft delete to protect against accidental deletion of secrets and keys",
+            check=lambda scanner, vault: not scanner._has_soft_delete_enabled(vault),
+            metadata=lambda vault: {
+                "soft_delete_enabled": vault.properties.enable_soft_delete if hasattr(vault.properties, 'enable_soft_delete') else False
+            }
+        ),
+        ScanRule(
+            title="Purge Protection Not Enabled",
+            description="Key Vault does not have purge protection enabled",
+            severity=SeverityLevel.MEDIUM,
+            base_score=45,
+            recommendation="Enable purge protection to prevent permanent deletion of soft-deleted items",
+            check=lambda scanner, vault: not scanner._has_purge_protection(vault),
+            metadata=lambda vault: {
+                "purge_protection_enabled": vault.properties.enable_purge_protection if hasattr(vault.properties, 'enable_purge_protection') else False
+            }
+        ),
+        ScanRule(
+            title="Not Using RBAC Authorization",
+            description="Key Vault is using access policies instead of Azure RBAC for authorization",
+            severity=SeverityLevel.LOW,
+            base_score=30,
+            recommendation="Consider using Azure RBAC for more granular and centralized access control",
+            check=lambda scanner, vault: not scanner._uses_rbac_authorization(vault),
+            metadata=lambda vault: {
+                "enable_rbac_authorization": vault.properties.enable_rbac_authorization if hasattr(vault.properties, 'enable_rbac_authorization') else False
+            }
+        ),
+        ScanRule(
+            title="Azure Services Bypass Enabled",
+            description="Key Vault allows Azure services to bypass network rules",
+            severity=SeverityLevel.LOW,
+            base_score=25,
+            recommendation="Review if Azure services bypass is necessary for your security requirements",
+            check=_allows_azure_services_bypass,
+            metadata=lambda vault: {
+                "bypass_services": _bypass_services(vault)
+            }
+        )
+    )
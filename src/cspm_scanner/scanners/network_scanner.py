@@ -1,8 +1,10 @@
 """Network security group scanner."""
 
-from typing import List
-import asyncio
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
 import ipaddress
+import logging
 
 from azure.mgmt.network import NetworkManagementClient
 from azure.core.exceptions import HttpResponseError
@@ -11,10 +13,196 @@ from .base_scanner import BaseScanner
 from ..models import SecurityFinding, ResourceType, SeverityLevel
 from ..auth import auth_manager
 
+logger = logging.getLogger(__name__)
+
+# Source prefixes that mean "any internet address"
+_INTERNET_PREFIXES = frozenset(("*", "0.0.0.0/0", "Internet"))
+
+# Ports whose exposure raises an overly permissive rule to high severity, sorted for bisect
+_HIGH_RISK_PORTS = (22, 1433, 3306, 3389, 5432, 6379, 27017)
+_HIGH_RISK_PORT_NAMES = frozenset(str(port) for port in _HIGH_RISK_PORTS)
+
+
+@lru_cache(maxsize=4096)
+def _parse_port_range(port_range: str) -> Optional[Tuple[int, int]]:
+    """Parse a "start-end" port range, or return None if it is not one."""
+    if "-" not in port_range:
+        return None
+    try:
+        start, end = map(int, port_range.split("-"))
+    except ValueError:
+        return None
+    return start, end
+
+
+def _range_has_high_risk_port(start: int, end: int) -> bool:
+    """Check if the inclusive range start-end contains a high-risk port."""
+    i = bisect_left(_HIGH_RISK_PORTS, start)
+    return i < len(_HIGH_RISK_PORTS) and _HIGH_RISK_PORTS[i] <= end
+
+
+@lru_cache(maxsize=4096)
+def _cidr_network(prefix: str):
+    """Parse an address prefix as an IP network, or return None for service tags and invalid input."""
+    try:
+        return ipaddress.ip_network(prefix, strict=False)
+    except ValueError:
+        return None
+
+
+def _cidr_prefixlen(prefix: str) -> Optional[int]:
+    """Return the prefix length of a CIDR block, or None if it does not parse."""
+    network = _cidr_network(prefix)
+    return network.prefixlen if network is not None else None
+
+
+def _prefix_covers(outer: Optional[str], inner: Optional[str]) -> bool:
+    """Check if address prefix ``outer`` matches every address ``inner`` matches."""
+    if outer == "*":
+        return True
+    if not outer or not inner:
+        return False
+    if outer == inner:
+        return True
+    
+    outer_network = _cidr_network(outer)
+    inner_network = _cidr_network(inner)
+    return (
+        outer_network is not None
+        and inner_network is not None
+        and outer_network.version == inner_network.version
+        and inner_network.subnet_of(outer_network)
+    )
+
+
+def _port_bounds(port_range: str) -> Optional[Tuple[int, int]]:
+    """Return the inclusive bounds of a single port or port range."""
+    if port_range.isdigit():
+        port = int(port_range)
+        return port, port
+    return _parse_port_range(port_range)
+
+
+def _port_range_covers(outer: Optional[str], inner: Optional[str]) -> bool:
+    """Check if port range ``outer`` matches every port ``inner`` matches."""
+    if outer == "*":
+        return True
+    if not outer or not inner or inner == "*":
+        return False
+    if outer == inner:
+        return True
+    
+    outer_bounds = _port_bounds(outer)
+    inner_bounds = _port_bounds(inner)
+    return (
+        outer_bounds is not None
+        and inner_bounds is not None
+        and outer_bounds[0] <= inner_bounds[0]
+        and inner_bounds[1] <= outer_bounds[1]
+    )
+
+
+def _find_shadowing_rule(rule, deny_rules):
+    """Return the first higher-priority deny rule that matches all traffic an allow rule does.
+    
+    Only the singular prefix and port fields are compared; rules using address lists or
+    application security groups are only covered by a "*" deny. ``deny_rules`` must be
+    sorted by priority.
+    """
+    if rule.priority is None:
+        return None
+    
+    for deny_rule in deny_rules:
+        if deny_rule.priority >= rule.priority:
+            break
+        if (
+            (deny_rule.protocol == "*" or deny_rule.protocol == rule.protocol)
+            and _prefix_covers(deny_rule.source_address_prefix, rule.source_address_prefix)
+            and _prefix_covers(deny_rule.destination_address_prefix, rule.destination_address_prefix)
+            and _port_range_covers(deny_rule.source_port_range, rule.source_port_range)
+            and _port_range_covers(deny_rule.destination_port_range, rule.destination_port_range)
+        ):
+            return deny_rule
+    
+    return None
+
+
+def _is_overly_permissive_prefix(prefix: Optional[str]) -> bool:
+    """Check if a source address prefix is overly broad."""
+    if not prefix:
+        return False
+    
+    # Check for internet access
+    if prefix in _INTERNET_PREFIXES:
+        return True
+    
+    # Check for very broad CIDR blocks - allow /24 or more specific, flag /16 or broader.
+    # Longer prefixes can never be flagged, so they skip parsing the address.
+    slash = prefix.rfind("/")
+    if slash != -1:
+        length = prefix[slash + 1:]
+        if length.isascii() and length.isdigit() and int(length) > 16:
+            return False
+        prefixlen = _cidr_prefixlen(prefix)
+        return prefixlen is not None and prefixlen <= 16
+    
+    return False
+
+
+# NSGs are often stamped from the same templates, so identical rules are classified once
+@lru_cache(maxsize=4096)
+def _classify_rule(
+    access: str,
+    source_prefix: Optional[str],
+    port_range: Optional[str]
+) -> Tuple[Optional[SeverityLevel], bool, bool]:
+    """Classify a non-deny inbound rule, parsing its destination port range once.
+    
+    Returns the severity of an overly permissive source finding (None if the source is
+    acceptable) and whether the rule opens RDP and SSH to the internet.
+    """
+    permissive = _is_overly_permissive_prefix(source_prefix)
+    open_to_internet = access == "Allow" and source_prefix in _INTERNET_PREFIXES
+    
+    bounds = None
+    if open_to_internet or (permissive and port_range):
+        bounds = _parse_port_range(port_range)
+    
+    severity = None
+    if permissive:
+        if not port_range:
+            severity = SeverityLevel.MEDIUM
+        elif port_range in _HIGH_RISK_PORT_NAMES or (
+            bounds is not None and _range_has_high_risk_port(*bounds)
+        ):
+            severity = SeverityLevel.HIGH
+        else:
+            severity = SeverityLevel.MEDIUM
+    
+    if not open_to_internet:
+        return severity, False, False
+    
+    rdp_open = port_range == "3389" or (bounds is not None and bounds[0] <= 3389 <= bounds[1])
+    ssh_open = port_range == "22" or (bounds is not None and bounds[0] <= 22 <= bounds[1])
+    return severity, rdp_open, ssh_open
+
+
+def _exposure_metadata(rule) -> Dict[str, Any]:
+    """Build the metadata reported when a rule opens a management port to the internet."""
+    return {
+        "rule_name": rule.name,
+        "protocol": rule.protocol,
+        "source_address_prefix": rule.source_address_prefix,
+        "destination_port_range": rule.destination_port_range,
+        "access": rule.access
+    }
+
 
 class NetworkScanner(BaseScanner):
     """Scanner for Azure Network Security Groups."""
     
+    __slots__ = ("client",)
+    
     def __init__(self, subscription_id: str):
         super().__init__(subscription_id, ResourceType.NETWORK_SECURITY_GROUP)
         self.client = auth_manager.get_network_client(subscription_id)
@@ -24,24 +212,17 @@ class NetworkScanner(BaseScanner):
         findings = []
         
         try:
-            nsgs = list(self.client.network_security_groups.list_all())
-            
-            # Process NSGs concurrently
-            tasks = [self._scan_nsg(nsg) for nsg in nsgs]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    continue
-                if isinstance(result, list):
-                    findings.extend(result)
+            # Rule checks never block, so each page is checked inline as it arrives
+            async for page in self._iter_pages(self.client.network_security_groups.list_all()):
+                for nsg in page:
+                    findings.extend(self._scan_nsg(nsg))
                     
         except Exception as e:
-            print(f"Error scanning network security groups: {str(e)}")
+            logger.warning("Error scanning network security groups: %s", e)
         
         return findings
     
-    async def _scan_nsg(self, nsg) -> List[SecurityFinding]:
+    def _scan_nsg(self, nsg) -> List[SecurityFinding]:
         """Scan a single network security group for security issues."""
         findings = []
         
@@ -49,17 +230,51 @@ class NetworkScanner(BaseScanner):
             if not nsg.security_rules:
                 return findings
             
-            resource_group = nsg.id.split('/')[4]
+            resource_group = self.get_resource_group(nsg.id)
+            
+            inbound_rules = [rule for rule in nsg.security_rules if rule.direction == "Inbound"]
             
-            for rule in nsg.security_rules:
-                if rule.direction == "Inbound":
+            # Allow rules fully covered by a higher-priority deny never take effect
+            deny_rules = sorted(
+                (rule for rule in inbound_rules if rule.access == "Deny" and rule.priority is not None),
+                key=lambda rule: rule.priority
+            )
+            
+            for rule in inbound_rules:
+                shadowing_rule = None
+                if deny_rules and rule.access == "Allow":
+                    shadowing_rule = _find_shadowing_rule(rule, deny_rules)
+                
+                if shadowing_rule is not None:
+                    findings.append(self._shadowed_rule_finding(nsg, rule, shadowing_rule, resource_group))
+                else:
                     findings.extend(self._check_inbound_rule(nsg, rule, resource_group))
                     
         except Exception as e:
-            print(f"Error scanning NSG {nsg.name}: {str(e)}")
+            logger.warning("Error scanning NSG %s: %s", nsg.name, e)
         
         return findings
     
+    def _shadowed_rule_finding(self, nsg, rule, deny_rule, resource_group: str) -> SecurityFinding:
+        """Report an allow rule that a higher-priority deny rule makes unreachable."""
+        return self.create_finding(
+            resource_id=nsg.id,
+            resource_name=nsg.name,
+            resource_group=resource_group,
+            location=nsg.location,
+            title="Shadowed Rule",
+            description=f"NSG rule '{rule.name}' never takes effect because higher-priority deny rule '{deny_rule.name}' matches all of its traffic",
+            severity=SeverityLevel.INFO,
+            recommendation="Remove the shadowed rule or correct its priority so the rule set reflects the intended access",
+            risk_score=self.calculate_risk_score(SeverityLevel.INFO, 10),
+            metadata={
+                "rule_name": rule.name,
+                "priority": rule.priority,
+                "shadowed_by": deny_rule.name,
+                "shadowed_by_priority": deny_rule.priority
+            }
+        )
+    
     def _check_inbound_rule(self, nsg, rule, resource_group: str) -> List[SecurityFinding]:
         """Check inbound security rules for misconfigurations."""
         findings = []
@@ -68,10 +283,14 @@ class NetworkScanner(BaseScanner):
         if rule.access == "Deny":
             return findings
         
+        # Parse the destination ports once for all three checks
+        permissive_severity, rdp_open, ssh_open = _classify_rule(
+            rule.access, rule.source_address_prefix, rule.destination_port_range
+        )
+        
         # Check for overly permissive source addresses
-        if self._is_overly_permissive_source(rule):
-            severity = self._get_severity_for_port_range(rule.destination_port_range)
-            
+        if permissive_severity is not None:
+            severity = permissive_severity
             findings.append(self.create_finding(
                 resource_id=nsg.id,
                 resource_name=nsg.name,
@@ -94,8 +313,12 @@ class NetworkScanner(BaseScanner):
                 }
             ))
         
+        # RDP and SSH findings report the same rule fields, so they share one dict
+        if rdp_open or ssh_open:
+            exposure_metadata = _exposure_metadata(rule)
+        
         # Check for RDP access from internet
-        if self._is_rdp_from_internet(rule):
+        if rdp_open:
             findings.append(self.create_finding(
                 resource_id=nsg.id,
                 resource_name=nsg.name,
@@ -106,17 +329,11 @@ class NetworkScanner(BaseScanner):
                 severity=SeverityLevel.HIGH,
                 recommendation="Restrict RDP access to specific IP addresses or use VPN/Bastion",
                 risk_score=self.calculate_risk_score(SeverityLevel.HIGH, 85),
-                metadata={
-                    "rule_name": rule.name,
-                    "protocol": rule.protocol,
-                    "source_address_prefix": rule.source_address_prefix,
-                    "destination_port_range": rule.destination_port_range,
-                    "access": rule.access
-                }
+                metadata=exposure_metadata
             ))
         
         # Check for SSH access from internet
-        if self._is_ssh_from_internet(rule):
+        if ssh_open:
             findings.append(self.create_finding(
                 resource_id=nsg.id,
                 resource_name=nsg.name,
@@ -127,103 +344,7 @@ class NetworkScanner(BaseScanner):
                 severity=SeverityLevel.HIGH,
                 recommendation="Restrict SSH access to specific IP addresses or use VPN/Bastion",
                 risk_score=self.calculate_risk_score(SeverityLevel.HIGH, 80),
-                metadata={
-                    "rule_name": rule.name,
-                    "protocol": rule.protocol,
-                    "source_address_prefix": rule.source_address_prefix,
-                    "destination_port_range": rule.destination_port_range,
-                    "access": rule.access
-                }
+                metadata=exposure_metadata
             ))
         
         return findings
-    
-    def _is_overly_permissive_source(self, rule) -> bool:
-        """Check if rule allows access from overly broad source."""
-        if not rule.source_address_prefix:
-            return False
-        
-        # Check for internet access
-        if rule.source_address_prefix in ["*", "0.0.0.0/0", "Internet"]:
-            return True
-        
-        # Check for very broad CIDR blocks
-        try:
-            if "/" in rule.source_address_prefix:
-                network = ipaddress.ip_network(rule.source_address_prefix, strict=False)
-                # Allow /24 or more specific, flag /16 or broader
-                if network.prefixlen <= 16:
-                    return True
-        except ValueError:
-            pass
-        
-        return False
-    
-    def _is_rdp_from_internet(self, rule) -> bool:
-        """Check if rule allows RDP from internet."""
-        if rule.access != "Allow":
-            return False
-        
-        if rule.source_address_prefix not in ["*", "0.0.0.0/0", "Internet"]:
-            return False
-        
-        # Check for RDP port (3389)
-        if rule.destination_port_range == "3389":
-            return True
-        
-        # Check for port ranges that include 3389
-        if "-" in rule.destination_port_range:
-            try:
-                start, end = map(int, rule.destination_port_range.split("-"))
-                if start <= 3389 <= end:
-                    return True
-            except ValueError:
-                pass
-        
-        return False
-    
-    def _is_ssh_from_internet(self, rule) -> bool:
-        """Check if rule allows SSH from internet."""
-        if rule.access != "Allow":
-            return False
-        
-        if rule.source_address_prefix not in ["*", "0.0.0.0/0", "Internet"]:
-            return False
-        
-        # Check for SSH port (22)
-        if rule.destination_port_range == "22":
-            return True
-        
-        # Check for port ranges that include 22
-        if "-" in rule.destination_port_range:
-            try:
-                start, end = map(int, rule.destination_port_range.split("-"))
-                if start <= 22 <= end:
-                    return True
-            except ValueError:
-                pass
-        
-        return False
-    
-    def _get_severity_for_port_range(self, port_range: str) -> SeverityLevel:
-        """Determine severity based on port range."""
-        if not port_range:
-            return SeverityLevel.MEDIUM
-        
-        # High-risk ports
-        high_risk_ports = ["22", "3389", "1433", "3306", "5432", "6379", "27017"]
-        
-        if port_range in high_risk_ports:
-            return SeverityLevel.HIGH
-        
-        # Check if port range includes high-risk ports
-        if "-" in port_range:
-            try:
-                start, end = map(int, port_range.split("-"))
-                for port in high_risk_ports:
-                    if start <= int(port) <= end:
-                        return SeverityLevel.HIGH
-            except ValueError:
-                pass
-        
-        return SeverityLevel.MEDIUM
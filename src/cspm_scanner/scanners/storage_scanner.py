@@ -1,7 +1,7 @@
 """Storage account security scanner."""
 
+import logging
 from typing import List
-import asyncio
 
 from azure.mgmt.storage import StorageManagementClient
 from azure.core.exceptions import HttpResponseError
@@ -10,10 +10,14 @@ from .base_scanner import BaseScanner
 from ..models import SecurityFinding, ResourceType, SeverityLevel
 from ..auth import auth_manager
 
+logger = logging.getLogger(__name__)
+
 
 class StorageScanner(BaseScanner):
     """Scanner for Azure Storage accounts."""
     
+    __slots__ = ("client",)
+    
     def __init__(self, subscription_id: str):
         super().__init__(subscription_id, ResourceType.STORAGE_ACCOUNT)
         self.client = auth_manager.get_storage_client(subscription_id)
@@ -23,40 +27,32 @@ class StorageScanner(BaseScanner):
         findings = []
         
         try:
-            storage_accounts = list(self.client.storage_accounts.list())
-            
-            # Process storage accounts concurrently
-            tasks = [self._scan_storage_account(account) for account in storage_accounts]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for result in results:
-                if isinstance(result, Exception):
-                    continue
-                if isinstance(result, list):
-                    findings.extend(result)
+            # The listing returns each account's full properties, so accounts are
+            # checked inline as their page arrives
+            async for page in self._iter_pages(self.client.storage_accounts.list()):
+                for account in page:
+                    findings.extend(self._scan_storage_account(account))
                     
         except Exception as e:
-            print(f"Error scanning storage accounts: {str(e)}")
+            logger.warning("Error scanning storage accounts: %s", e)
         
         return findings
     
-    async def _scan_storage_account(self, storage_account) -> List[SecurityFinding]:
+    def _scan_storage_account(self, storage_account) -> List[SecurityFinding]:
         """Scan a single storage account for security issues."""
         findings = []
         
         try:
-            # Get storage account properties
-            account_props = self.client.storage_accounts.get_properties(
-                storage_account.id.split('/')[4],  # resource group
-                storage_account.name
-            )
+            # Listed accounts already carry the properties get_properties would return
+            account_props = storage_account
+            resource_group = self.get_resource_group(storage_account.id)
             
             # Check for public blob access
             if self._has_public_blob_access(account_props):
                 findings.append(self.create_finding(
                     resource_id=storage_account.id,
                     resource_name=storage_account.name,
-                    resource_group=storage_account.id.split('/')[4],
+                    resource_group=resource_group,
                     location=storage_account.location,
                     title="Public Blob Access Enabled",
                     description="Storage account allows public access to blob containers",
@@ -74,7 +70,7 @@ class StorageScanner(BaseScanner):
                 findings.append(self.create_finding(
                     resource_id=storage_account.id,
                     resource_name=storage_account.name,
-                    resource_group=storage_account.id.split('/')[4],
+                    resource_group=resource_group,
                     location=storage_account.location,
                     title="Insecure Transfer Enabled",
                     description="Storage account allows unencrypted HTTP traffic",
@@ -91,7 +87,7 @@ class StorageScanner(BaseScanner):
                 findings.append(self.create_finding(
                     resource_id=storage_account.id,
                     resource_name=storage_account.name,
-                    resource_group=storage_account.id.split('/')[4],
+                    resource_group=resource_group,
                     location=storage_account.location,
                     title="Storage Encryption Not Fully Enabled",
                     description="Some storage services have encryption disabled",
@@ -111,7 +107,7 @@ class StorageScanner(BaseScanner):
                 findings.append(self.create_finding(
                     resource_id=storage_account.id,
                     resource_name=storage_account.name,
-                    resource_group=storage_account.id.split('/')[4],
+                    resource_group=resource_group,
                     location=storage_account.location,
                     title="Default Network Access Allowed",
                     description="Storage account allows public network access by default",
@@ -125,14 +121,14 @@ class StorageScanner(BaseScanner):
                 ))
             
         except Exception as e:
-            print(f"Error scanning storage account {storage_account.name}: {str(e)}")
+            logger.warning("Error scanning storage account %s: %s", storage_account.name, e)
         
         return findings
     
     def _has_public_blob_access(self, account_props) -> bool:
         """Check if storage account allows public blob access."""
         # Check the allow_blob_public_access property
-        if hasattr(account_props, 'allow_blob_public_access') and account_props.allow_blob_public_access:
+        if getattr(account_props, 'allow_blob_public_access', None):
             return True
         
         # Check network rule set
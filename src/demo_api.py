@@ -1,11 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import json
+import orjson
+import time
 from datetime import datetime
 
-app = FastAPI(title="CSPM Demo API", version="1.0.0")
+app = FastAPI(title="CSPM Demo API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -100,6 +103,86 @@ mock_findings = [
     }
 ]
 
+mock_scans = [
+    {
+        "scan_id": "scan-20240101000000",
+        "status": "completed",
+        "progress": 100,
+        "started_at": "2024-01-01T00:00:00Z",
+        "completed_at": "2024-01-01T00:30:00Z"
+    },
+    {
+        "scan_id": "scan-20240101120000",
+        "status": "completed", 
+        "progress": 100,
+        "started_at": "2024-01-01T12:00:00Z",
+        "completed_at": "2024-01-01T12:30:00Z"
+    }
+]
+
+mock_reports = {
+    "reports": [
+        {
+            "id": "report-001",
+            "scan_id": "scan-20240101000000",
+            "format": "html",
+            "created_at": "2024-01-01T00:30:00Z",
+            "file_size": 1024000
+        },
+        {
+            "id": "report-002",
+            "scan_id": "scan-20240101120000",
+            "format": "json",
+            "created_at": "2024-01-01T12:30:00Z",
+            "file_size": 512000
+        }
+    ],
+    "statistics": {
+        "total_reports": 2,
+        "total_size": 1536000,
+        "latest_report": "2024-01-01T12:30:00Z"
+    }
+}
+
+# Static responses are serialized once, shaped by their response models, and
+# returned as raw bodies so requests skip validation and encoding
+_SUBSCRIPTIONS_JSON = orjson.dumps([Subscription(**sub).model_dump() for sub in mock_subscriptions])
+_SCANS_JSON = orjson.dumps([ScanStatus(**scan).model_dump() for scan in mock_scans])
+_REPORTS_JSON = orjson.dumps(mock_reports)
+_JSON_REPORT_JSON = orjson.dumps({"message": "JSON report download", "data": mock_findings})
+
+# Per-request responses are validated once here; handlers only fill in the
+# fields that vary and encode the result
+_SCAN_STATUS = ScanStatus(
+    scan_id="",
+    status="completed",
+    progress=100,
+    started_at="2024-01-01T00:00:00Z",
+    completed_at="2024-01-01T00:30:00Z"
+).model_dump()
+_SCAN_RESULT = ScanResult(
+    subscription_id="sub-001",
+    subscription_name="Production Subscription",
+    scan_timestamp="",
+    total_resources_scanned=25,
+    total_findings=len(mock_findings),
+    findings_by_severity={"high": 1, "medium": 1},
+    risk_score=75,
+    scan_duration_seconds=180,
+    findings=mock_findings
+).model_dump()
+
+# (epoch second, ISO timestamp) for the last second a timestamp was served
+_now_iso_cache = (0, "")
+
+def _now_iso() -> str:
+    """Return the current local time as an ISO string, formatted at most once a second."""
+    global _now_iso_cache
+    second = int(time.time())
+    if second != _now_iso_cache[0]:
+        _now_iso_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _now_iso_cache[1]
+
 # API Endpoints
 @app.options("/scan/start")
 async def options_scan_start():
@@ -107,11 +190,11 @@ async def options_scan_start():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {"status": "healthy", "timestamp": _now_iso()}
 
 @app.get("/subscriptions", response_model=List[Subscription])
 async def get_subscriptions():
-    return mock_subscriptions
+    return Response(_SUBSCRIPTIONS_JSON, media_type="application/json")
 
 @app.post("/scan/start", response_model=ScanStartResponse)
 async def start_scan(scan_request: ScanRequest):
@@ -124,47 +207,16 @@ async def start_scan(scan_request: ScanRequest):
 
 @app.get("/scan/{scan_id}/status", response_model=ScanStatus)
 async def get_scan_status(scan_id: str):
-    return {
-        "scan_id": scan_id,
-        "status": "completed",
-        "progress": 100,
-        "started_at": "2024-01-01T00:00:00Z",
-        "completed_at": "2024-01-01T00:30:00Z"
-    }
+    return Response(orjson.dumps({**_SCAN_STATUS, "scan_id": scan_id}), media_type="application/json")
 
 @app.get("/scan/{scan_id}/result", response_model=ScanResult)
 async def get_scan_result(scan_id: str):
-    findings_by_severity = {"high": 1, "medium": 1}
-    return {
-        "subscription_id": "sub-001",
-        "subscription_name": "Production Subscription",
-        "scan_timestamp": datetime.now().isoformat(),
-        "total_resources_scanned": 25,
-        "total_findings": len(mock_findings),
-        "findings_by_severity": findings_by_severity,
-        "risk_score": 75,
-        "scan_duration_seconds": 180,
-        "findings": mock_findings
-    }
+    result = {**_SCAN_RESULT, "scan_timestamp": _now_iso()}
+    return Response(orjson.dumps(result), media_type="application/json")
 
 @app.get("/scans", response_model=List[ScanStatus])
 async def list_scans():
-    return [
-        {
-            "scan_id": "scan-20240101000000",
-            "status": "completed",
-            "progress": 100,
-            "started_at": "2024-01-01T00:00:00Z",
-            "completed_at": "2024-01-01T00:30:00Z"
-        },
-        {
-            "scan_id": "scan-20240101120000",
-            "status": "completed", 
-            "progress": 100,
-            "started_at": "2024-01-01T12:00:00Z",
-            "completed_at": "2024-01-01T12:30:00Z"
-        }
-    ]
+    return Response(_SCANS_JSON, media_type="application/json")
 
 @app.delete("/scan/{scan_id}")
 async def delete_scan(scan_id: str):
@@ -175,33 +227,11 @@ async def download_scan_report(scan_id: str, format: str = 'json'):
     if format == 'html':
         return {"message": "HTML report download", "content": "<html><body>Sample Report</body></html>"}
     else:
-        return {"message": "JSON report download", "data": mock_findings}
+        return Response(_JSON_REPORT_JSON, media_type="application/json")
 
 @app.get("/reports")
 async def list_reports():
-    return {
-        "reports": [
-            {
-                "id": "report-001",
-                "scan_id": "scan-20240101000000",
-                "format": "html",
-                "created_at": "2024-01-01T00:30:00Z",
-                "file_size": 1024000
-            },
-            {
-                "id": "report-002",
-                "scan_id": "scan-20240101120000",
-                "format": "json",
-                "created_at": "2024-01-01T12:30:00Z",
-                "file_size": 512000
-            }
-        ],
-        "statistics": {
-            "total_reports": 2,
-            "total_size": 1536000,
-            "latest_report": "2024-01-01T12:30:00Z"
-        }
-    }
+    return Response(_REPORTS_JSON, media_type="application/json")
 
 @app.get("/reports/{filename}")
 async def download_report(filename: str):